@@ -0,0 +1,163 @@
+import time
+from typing import List, Optional
+from models import Character, Spell
+from game_state import StateLog, MOVE, CAST
+from zobrist import TranspositionTable, zobrist_keys
+
+# Evaluation weights: damage dealt dominates, kills break ties between equal
+# damage, and distance to the nearest target only matters when nothing else does.
+# HP and kills count the same on the searching side, so area casts that also
+# hit the caster or its allies pay for it
+HP_WEIGHT = 10
+KILL_WEIGHT = 500
+DISTANCE_WEIGHT = 1
+
+# Mixed into the state hash after a move, since a second move is not allowed then
+MOVED_KEY = zobrist_keys.key(("moved",))
+
+
+class _OutOfBudget(Exception):
+    pass
+
+
+class SearchAI:
+    """Depth-limited search over the moves and casts of one unit's turn
+
+    Plans are explored with make/undo on a StateLog, so no state is copied.
+    Casts are scored with the mean damage roll and never consume the
+    battle's RNG. Search deepens iteratively until max_depth, the time
+    budget or the node budget runs out; a node budget alone keeps seeded
+    battles reproducible. States reached again through a different action
+    order are recognized by their Zobrist hash and not searched twice.
+    """
+
+    def __init__(
+        self,
+        max_depth: int = 4,
+        time_budget: Optional[float] = 0.05,
+        max_nodes: Optional[int] = None,
+        table_size: int = 1 << 16,
+    ):
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.completed_depth = 0
+        self.best_score = 0
+        self.best_plan: List[tuple] = []
+        # State hash -> deepest remaining depth already searched from that state
+        self.table = TranspositionTable(table_size)
+
+    def take_turn(self, engine, character: Character, target_team: str):
+        for action in self.plan_turn(engine, character, target_team):
+            if action[0] == MOVE:
+                done = engine.move_character(character, action[1])
+            else:
+                done = engine.cast_spell(character, action[1], action[2])
+            # Real damage rolls can differ from the plan; stop once it no longer applies
+            if not done:
+                break
+        engine.end_turn()
+
+    def plan_turn(self, engine, character: Character, target_team: str) -> List[tuple]:
+        """Best sequence of (MOVE, cell, cost) and (CAST, spell, target cell) actions"""
+        log = StateLog(engine)
+        self.nodes = 0
+        self.completed_depth = 0
+        self.deadline = (
+            time.perf_counter() + self.time_budget if self.time_budget is not None else None
+        )
+        self.best_score = self.evaluate(engine, character, target_team)
+        self.best_plan = []
+        self.table.clear()
+        plan: List[tuple] = []
+        try:
+            for depth in range(1, self.max_depth + 1):
+                self._search(engine, log, character, target_team, depth, plan, False)
+                self.completed_depth = depth
+        except _OutOfBudget:
+            log.undo_to(0)
+        return self.best_plan
+
+    def _search(self, engine, log: StateLog, character: Character, target_team: str,
+                depth: int, plan: List[tuple], moved: bool):
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise _OutOfBudget()
+        if self.deadline is not None and not self.nodes & 255 and time.perf_counter() > self.deadline:
+            raise _OutOfBudget()
+
+        score = self.evaluate(engine, character, target_team)
+        if score > self.best_score:
+            self.best_score = score
+            self.best_plan = list(plan)
+        if depth == 0:
+            return
+        state_hash = engine.board.hash ^ MOVED_KEY if moved else engine.board.hash
+        searched = self.table.lookup(state_hash)
+        if searched is not None and searched >= depth:
+            return
+        self.table.store(state_hash, depth)
+
+        mark = log.mark()
+        for action in self.actions(engine, character, target_team, moved):
+            if action[0] == MOVE:
+                log.move(character, action[1], action[2])
+            else:
+                spell = action[1]
+                log.cast(character, spell,
+                         engine.board.get_units_in_area(spell, character.position, action[2]),
+                         self.expected_damage(spell))
+            plan.append(action)
+            self._search(engine, log, character, target_team, depth - 1, plan, action[0] == MOVE)
+            plan.pop()
+            log.undo_to(mark)
+
+    def actions(self, engine, character: Character, target_team: str, moved: bool) -> List[tuple]:
+        """Legal casts first, then moves; two moves in a row are never better than one"""
+        board = engine.board
+        x, y = character.position
+        actions = []
+        for spell in character.spells.values():
+            # Only damage is modelled by StateLog.cast; heals and pushes are left to the player
+            if spell.effect_type != "damage" or spell.ap_cost > character.action_points:
+                continue
+            for target in board.get_units_in_range(character.position, spell.range_max, [target_team]):
+                tx, ty = target.position
+                if abs(tx - x) + abs(ty - y) < spell.range_min:
+                    continue
+                if spell.requires_los and not board.has_line_of_sight(character.position, target.position):
+                    continue
+                actions.append((CAST, spell, target.position))
+        if not moved and character.movement_points > 0:
+            reachable = board.get_reachable(character.position, character.movement_points)
+            actions.extend((MOVE, cell, cost) for cell, cost in reachable.items())
+        return actions
+
+    def expected_damage(self, spell: Spell) -> int:
+        return (spell.damage_min + spell.damage_max) // 2
+
+    def evaluate(self, engine, character: Character, target_team: str) -> int:
+        x, y = character.position
+        score = 0
+        # combatants still holds units removed from the board, so friendly deaths are seen
+        for unit in engine.combatants:
+            if unit.team != character.team:
+                continue
+            if unit.current_hp <= 0:
+                score -= KILL_WEIGHT
+            else:
+                score += HP_WEIGHT * unit.current_hp
+        nearest = None
+        for target in engine.board.get_team(target_team):
+            if target.current_hp <= 0:
+                score += KILL_WEIGHT
+                continue
+            score -= HP_WEIGHT * target.current_hp + KILL_WEIGHT
+            tx, ty = target.position
+            distance = abs(tx - x) + abs(ty - y)
+            if nearest is None or distance < nearest:
+                nearest = distance
+        if nearest is not None:
+            score -= DISTANCE_WEIGHT * nearest
+        return score
@@ -0,0 +1,97 @@
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from pathfinding import PathFinder, CELL_UNIT
+
+# Facing used when a directional spell is cast on the caster's own cell
+DEFAULT_DIRECTION = (0, -1)
+
+
+def direction(origin: Tuple[int, int], target: Tuple[int, int]) -> Tuple[int, int]:
+    """Dominant axis from origin to target as a unit step; ties go to the horizontal axis"""
+    dx = target[0] - origin[0]
+    dy = target[1] - origin[1]
+    if dx == 0 and dy == 0:
+        return DEFAULT_DIRECTION
+    if abs(dx) >= abs(dy):
+        return (1 if dx > 0 else -1, 0)
+    return (0, 1 if dy > 0 else -1)
+
+
+@lru_cache(maxsize=None)
+def stencil(shape: str, size: int, facing: Tuple[int, int] = DEFAULT_DIRECTION) -> Tuple[Tuple[int, int], ...]:
+    """Offsets from the target cell covered by an area, centre first
+
+    cross and circle are symmetric and ignore facing; line and cone extend
+    away from the caster along facing. circle uses Manhattan distance, like
+    spell ranges.
+    """
+    fx, fy = facing
+    # Perpendicular to the facing, for the width of a cone
+    px, py = -fy, fx
+    if shape == "single" or size <= 0:
+        return ((0, 0),)
+    if shape == "cross":
+        offsets = [(0, 0)]
+        for k in range(1, size + 1):
+            offsets.extend(((k, 0), (-k, 0), (0, k), (0, -k)))
+        return tuple(offsets)
+    if shape == "circle":
+        return tuple(
+            (dx, dy)
+            for distance in range(size + 1)
+            for dx in range(-distance, distance + 1)
+            for dy in sorted({distance - abs(dx), abs(dx) - distance})
+        )
+    if shape == "line":
+        return tuple((fx * k, fy * k) for k in range(size + 1))
+    if shape == "cone":
+        return tuple(
+            (fx * k + px * j, fy * k + py * j)
+            for k in range(size + 1)
+            for j in sorted(range(-k, k + 1), key=abs)
+        )
+    raise ValueError(f"unknown area shape {shape!r}")
+
+
+class AreaStencils:
+    """Area stencils compiled to flat occupancy offsets for one board size
+
+    A target far enough from the edges uses the flat offsets directly; only
+    areas that may cross an edge pay for per-cell bounds checks.
+    """
+
+    def __init__(self, finder: PathFinder):
+        self.finder = finder
+        # (shape, size, facing) -> (offsets, flat offsets, reach)
+        self.compiled: Dict[Tuple[str, int, Tuple[int, int]], tuple] = {}
+
+    def _compile(self, shape: str, size: int, facing: Tuple[int, int]) -> tuple:
+        key = (shape, size, facing)
+        compiled = self.compiled.get(key)
+        if compiled is None:
+            offsets = stencil(shape, size, facing)
+            width = self.finder.width
+            flat = tuple(dy * width + dx for dx, dy in offsets)
+            reach = max(max(abs(dx), abs(dy)) for dx, dy in offsets)
+            compiled = self.compiled[key] = (offsets, flat, reach)
+        return compiled
+
+    def cells(self, shape: str, size: int, origin: int, target: int) -> List[int]:
+        """Flat indices covered by an area cast from origin onto target"""
+        finder = self.finder
+        xs, ys = finder.xs, finder.ys
+        tx, ty = xs[target], ys[target]
+        facing = direction((xs[origin], ys[origin]), (tx, ty)) if shape in ("line", "cone") else DEFAULT_DIRECTION
+        offsets, flat, reach = self._compile(shape, size, facing)
+        width, height = finder.width, finder.height
+        if reach <= tx < width - reach and reach <= ty < height - reach:
+            return [target + delta for delta in flat]
+        return [
+            (ty + dy) * width + tx + dx
+            for dx, dy in offsets
+            if 0 <= tx + dx < width and 0 <= ty + dy < height
+        ]
+
+    def occupied_cells(self, occupancy: bytearray, shape: str, size: int, origin: int, target: int) -> List[int]:
+        """Flat indices in the area that hold a unit"""
+        return [index for index in self.cells(shape, size, origin, target) if occupancy[index] & CELL_UNIT]
@@ -0,0 +1,263 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Tuple, Any
+from ai_search import SearchAI
+from battle_engine import BattleEngine, ENEMY_TEAM
+from managers.data_manager import DataManager
+from models import Character, Player, Monster, Spell
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# Same roster and placement as GameManager.setup_game
+DEFAULT_LAYOUT = {
+    "player": (1, 1),
+    "monsters": [
+        ("Boss Monster", (8, 8), "boss"),
+        ("Monster 1", (7, 7), "normal"),
+        ("Monster 2", (8, 7), "normal"),
+        ("Monster 3", (2, 1), "normal"),
+    ],
+}
+
+_worker_data: Optional[DataManager] = None
+
+
+def apply_character_data(character: Character, data: Dict[str, Any], spells: Dict[str, Spell]):
+    character.max_hp = data.get("max_hp", character.max_hp)
+    character.current_hp = character.max_hp
+    character.max_movement_points = data.get("max_movement_points", character.max_movement_points)
+    character.movement_points = character.max_movement_points
+    character.max_action_points = data.get("max_action_points", character.max_action_points)
+    character.action_points = character.max_action_points
+    character.initiative = data.get("initiative", character.initiative)
+    if spells:
+        character.spells = spells
+
+
+def random_layout(rng: random.Random, width: int, height: int) -> Dict[str, Any]:
+    """Shuffle the default roster over the board, player on the left half, monsters on the right"""
+    cells = [(x, y) for x in range(width) for y in range(height)]
+    left = [cell for cell in cells if cell[0] < width // 2]
+    right = [cell for cell in cells if cell[0] >= width // 2]
+    monster_cells = rng.sample(right, len(DEFAULT_LAYOUT["monsters"]))
+    return {
+        "player": rng.choice(left),
+        "monsters": [
+            (name, cell, monster_type)
+            for (name, _, monster_type), cell in zip(DEFAULT_LAYOUT["monsters"], monster_cells)
+        ],
+    }
+
+
+def setup_data_battle(engine: BattleEngine, data: DataManager, layout: Dict[str, Any]):
+    """Set up a battle whose stats and spells come from the data files instead of the class defaults"""
+    player = Player("Hero", layout["player"])
+    apply_character_data(
+        player, data.get_character_data("player"), data.get_compiled_spells("player")
+    )
+
+    monsters = []
+    for name, position, monster_type in layout["monsters"]:
+        monster = Monster(name, position, monster_type)
+        apply_character_data(
+            monster,
+            data.get_character_data("monster", monster_type),
+            data.get_compiled_spells("monster", monster_type),
+        )
+        monsters.append(monster)
+
+    engine.setup_battle(player, monsters)
+
+
+def run_one(task: Tuple[int, str, int, int]) -> Dict[str, Any]:
+    seed, layout_name, max_turns, ai_nodes = task
+    engine = BattleEngine(seed=seed)
+    player_ai = None
+    if ai_nodes:
+        # A node budget rather than a time budget keeps seeded results reproducible.
+        # Both sides get the same policy, so the sweep measures the data, not the bots
+        engine.monster_ai = SearchAI(time_budget=None, max_nodes=ai_nodes)
+        player_ai = SearchAI(time_budget=None, max_nodes=ai_nodes)
+    if layout_name == "random":
+        layout = random_layout(engine.rng, engine.board.width, engine.board.height)
+    else:
+        layout = DEFAULT_LAYOUT
+    setup_data_battle(engine, _worker_data, layout)
+    won = engine.run_battle(max_turns, player_ai)
+
+    return {
+        "seed": seed,
+        "layout": layout_name,
+        "won": won,
+        "finished": engine.game_over,
+        "turns": engine.current_turn,
+        "player_hp": max(0, engine.player.current_hp),
+        "monsters_left": engine.board.team_size(ENEMY_TEAM),
+        "damage": engine.damage_by_spell,
+        "casts": engine.casts_by_spell,
+    }
+
+
+def _init_worker(data_path: str):
+    global _worker_data
+    _worker_data = DataManager(data_path)
+
+
+def spell_names(data: DataManager) -> List[str]:
+    names = list(data.spells_data.get("player_spells", {}))
+    for spells in data.spells_data.get("monster_spells", {}).values():
+        names.extend(name for name in spells if name not in names)
+    return names
+
+
+class SweepSummary:
+    """Running aggregate over streamed battle results"""
+
+    def __init__(self):
+        self.battles = 0
+        self.wins = 0
+        self.unfinished = 0
+        self.total_turns = 0
+        self.min_turns: Optional[int] = None
+        self.max_turns: Optional[int] = None
+        self.damage: Dict[str, int] = {}
+        self.casts: Dict[str, int] = {}
+
+    def add(self, result: Dict[str, Any]):
+        self.battles += 1
+        self.wins += result["won"]
+        self.unfinished += not result["finished"]
+        turns = result["turns"]
+        self.total_turns += turns
+        self.min_turns = turns if self.min_turns is None else min(self.min_turns, turns)
+        self.max_turns = turns if self.max_turns is None else max(self.max_turns, turns)
+        for name, value in result["damage"].items():
+            self.damage[name] = self.damage.get(name, 0) + value
+        for name, value in result["casts"].items():
+            self.casts[name] = self.casts.get(name, 0) + value
+
+    def to_dict(self) -> Dict[str, Any]:
+        battles = max(1, self.battles)
+        return {
+            "battles": self.battles,
+            "win_rate": self.wins / battles,
+            "unfinished": self.unfinished,
+            "avg_turns": self.total_turns / battles,
+            "min_turns": self.min_turns,
+            "max_turns": self.max_turns,
+            "spells": {
+                name: {
+                    "damage": self.damage[name],
+                    "casts": self.casts.get(name, 0),
+                    "damage_per_battle": self.damage[name] / battles,
+                    "damage_per_cast": self.damage[name] / max(1, self.casts.get(name, 0)),
+                }
+                for name in sorted(self.damage)
+            },
+        }
+
+
+def run_sweep(
+    battles: int,
+    seed: int = 0,
+    layout: str = "default",
+    workers: Optional[int] = None,
+    data_path: str = DEFAULT_DATA_PATH,
+    max_turns: int = 500,
+    csv_path: Optional[str] = None,
+    jsonl_path: Optional[str] = None,
+    chunksize: int = 256,
+    ai_nodes: int = 0,
+) -> Dict[str, Any]:
+    """Run seeded battles across a process pool, streaming rows to CSV/JSON lines as they finish"""
+    names = spell_names(DataManager(data_path))
+    summary = SweepSummary()
+    tasks = ((seed + i, layout, max_turns, ai_nodes) for i in range(battles))
+
+    csv_file = open(csv_path, "w", newline="") if csv_path else None
+    jsonl_file = open(jsonl_path, "w") if jsonl_path else None
+    try:
+        writer = None
+        if csv_file:
+            columns = ["seed", "layout", "won", "finished", "turns", "player_hp", "monsters_left"]
+            writer = csv.writer(csv_file)
+            writer.writerow(columns + [f"damage:{name}" for name in names])
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(data_path,)) as pool:
+            for result in pool.imap_unordered(run_one, tasks, chunksize):
+                summary.add(result)
+                if writer:
+                    writer.writerow(
+                        [
+                            result["seed"],
+                            result["layout"],
+                            int(result["won"]),
+                            int(result["finished"]),
+                            result["turns"],
+                            result["player_hp"],
+                            result["monsters_left"],
+                        ]
+                        + [result["damage"].get(name, 0) for name in names]
+                    )
+                if jsonl_file:
+                    jsonl_file.write(json.dumps(result) + "\n")
+        elapsed = time.perf_counter() - start
+    finally:
+        if csv_file:
+            csv_file.close()
+        if jsonl_file:
+            jsonl_file.close()
+
+    report = summary.to_dict()
+    report["seconds"] = elapsed
+    report["battles_per_second"] = battles / elapsed if elapsed else 0.0
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run seeded headless battles for balance sweeps")
+    parser.add_argument("-n", "--battles", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first battle")
+    parser.add_argument("--layout", choices=["default", "random"], default="default")
+    parser.add_argument("--workers", type=int, default=None, help="defaults to the CPU count")
+    parser.add_argument("--data-path", default=DEFAULT_DATA_PATH)
+    parser.add_argument("--max-turns", type=int, default=500)
+    parser.add_argument("--chunksize", type=int, default=256)
+    parser.add_argument(
+        "--ai-nodes", type=int, default=0,
+        help="plan both sides' turns with the search AI, exploring up to this many states per turn",
+    )
+    parser.add_argument("--csv", help="stream one row per battle to this file")
+    parser.add_argument("--jsonl", help="stream one JSON object per battle to this file")
+    parser.add_argument("--summary", help="write the aggregated report to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = run_sweep(
+        args.battles,
+        seed=args.seed,
+        layout=args.layout,
+        workers=args.workers,
+        data_path=args.data_path,
+        max_turns=args.max_turns,
+        csv_path=args.csv,
+        jsonl_path=args.jsonl,
+        chunksize=args.chunksize,
+        ai_nodes=args.ai_nodes,
+    )
+
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(report, f, indent=4)
+    json.dump(report, sys.stdout, indent=4)
+    print()
+
+
+if __name__ == "__main__":
+    main()
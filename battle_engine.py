@@ -0,0 +1,251 @@
+import random
+from typing import Dict, List, Tuple, Optional
+from models import Character, Player, Monster, Spell
+from game_board import GameBoard
+from turn_scheduler import TurnScheduler
+from zobrist import zobrist_keys
+
+PLAYER_TEAM = "player"
+ENEMY_TEAM = "enemy"
+
+
+class BattleEngine:
+    """Battle rules with no rendering, input or audio, so it runs without pygame"""
+
+    def __init__(self, width: int = 10, height: int = 10, seed: Optional[int] = None):
+        self.board = GameBoard(width, height)
+        # Always concrete, so a recorded battle can be replayed with the same rolls
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+        self.player: Character = None
+        self.current_turn = 0
+        # Everyone who joined the battle, in joining order, dead or alive
+        self.combatants: List[Character] = []
+        self.scheduler = TurnScheduler()
+        self.game_over = False
+        self.game_won = False
+        # Plans monster turns when set (e.g. ai_search.SearchAI); None uses the greedy rule
+        self.monster_ai = None
+        # Per-spell totals for the whole battle, keyed by spell name
+        self.damage_by_spell: Dict[str, int] = {}
+        self.casts_by_spell: Dict[str, int] = {}
+        # Set by start_recording; sees every command that changed the battle
+        self.recorder = None
+
+    def setup_battle(self, player: Character, monsters: List[Character]):
+        self.player = player
+        self.combatants = [player] + list(monsters)
+
+        for char in self.combatants:
+            self.board.add_character(char, char.position)
+            self.scheduler.add(char)
+        self.scheduler.start()
+
+    def start_recording(self, setup: str = "default", snapshot_interval: int = 10):
+        """Log every command from here on; call right after setting up the battle"""
+        from battle_log import BattleRecorder
+
+        self.recorder = BattleRecorder(self, setup, snapshot_interval)
+        return self.recorder
+
+    @property
+    def monsters(self) -> List[Character]:
+        return self.board.get_team(ENEMY_TEAM)
+
+    @property
+    def all_characters(self) -> List[Character]:
+        return self.board.get_units()
+
+    def setup_default_battle(self):
+        self.setup_battle(
+            Player("Hero", (1, 1)),
+            [
+                Monster("Boss Monster", (8, 8), "boss"),
+                Monster("Monster 1", (7, 7)),
+                Monster("Monster 2", (8, 7)),
+                Monster("Monster 3", (2, 1)),
+            ],
+        )
+
+    @property
+    def current_character(self) -> Character:
+        return self.scheduler.current
+
+    def state_hash(self) -> int:
+        """Hash of the board plus whose turn it is, for transposition tables and result caches"""
+        if self.scheduler.current is None:
+            return self.board.hash
+        return self.board.hash ^ zobrist_keys.key(("turn", self.board.hash_slot(self.current_character)))
+
+    def cast_spell(
+        self, character: Character, spell: Spell, target_pos: Tuple[int, int]
+    ) -> bool:
+        # AP and range; the server, replays, the UI and the AI all come through here
+        if not spell.can_cast(character, target_pos):
+            return False
+
+        if spell.requires_los and not self.board.has_line_of_sight(
+            character.position, target_pos
+        ):
+            return False
+
+        if spell.requires_target and self.board.get_character_at(target_pos) is None:
+            return False
+        targets = self.board.get_units_in_area(spell, character.position, target_pos)
+        if spell.effect_type == "heal":
+            targets = [t for t in targets if t.team == character.team]
+        elif spell.effect_type == "push":
+            targets = [t for t in targets if t is not character]
+        elif spell.effect_type != "damage":
+            return False
+        if not targets:
+            return False
+
+        character.action_points -= spell.ap_cost
+        spell_name = spell.name
+        if spell.effect_type == "heal":
+            # Only the caster's team is healed; the totals below are damage statistics
+            for target in targets:
+                target.heal(self.roll_healing(spell))
+        elif spell.effect_type == "push":
+            for target in targets:
+                self.push_character(character.position, target, spell.push_strength)
+        else:
+            # Every unit in the area is hit, caster and allies included, each with its own roll
+            total = 0
+            for target in targets:
+                damage = self.roll_damage(spell)
+                target.current_hp -= damage
+                total += damage
+            self.damage_by_spell[spell_name] = self.damage_by_spell.get(spell_name, 0) + total
+            self.casts_by_spell[spell_name] = self.casts_by_spell.get(spell_name, 0) + 1
+        if self.recorder is not None:
+            self.recorder.record_cast(character, spell_name, target_pos)
+
+        for target in targets:
+            # The player stays on the board when defeated so the game over screen can show it
+            if target.current_hp <= 0 and target is not self.player:
+                self.board.remove_character(target.position)
+                self.scheduler.remove(target)
+        return True
+
+    def roll_damage(self, spell: Spell) -> int:
+        # Fixed damage does not consume the RNG, so unseeded battles stay deterministic
+        if spell.damage_min == spell.damage_max:
+            return spell.damage_min
+        return self.rng.randint(spell.damage_min, spell.damage_max)
+
+    def roll_healing(self, spell: Spell) -> int:
+        if spell.healing_min == spell.healing_max:
+            return spell.healing_min
+        return self.rng.randint(spell.healing_min, spell.healing_max)
+
+    def push_character(self, origin: Tuple[int, int], target: Character, distance: int):
+        """Slide target up to distance cells straight away from origin, stopping at the first blocked cell"""
+        dx = target.position[0] - origin[0]
+        dy = target.position[1] - origin[1]
+        if abs(dx) >= abs(dy):
+            step = ((dx > 0) - (dx < 0), 0)
+        else:
+            step = (0, (dy > 0) - (dy < 0))
+        if step == (0, 0):
+            return
+        for _ in range(distance):
+            x, y = target.position
+            if not self.board.move_character(target, (x + step[0], y + step[1])):
+                break
+
+    def move_character(self, character: Character, new_pos: Tuple[int, int]) -> bool:
+        if character.movement_points > 0:
+            distance = self.board.get_reachable(
+                character.position, character.movement_points
+            ).get(new_pos)
+            if distance is not None and self.board.move_character(character, new_pos):
+                character.movement_points -= distance
+                if self.recorder is not None:
+                    self.recorder.record_move(character, new_pos)
+                return True
+        return False
+
+    def end_turn(self):
+        self.current_turn += 1
+        self.scheduler.advance().start_turn()
+        if self.recorder is not None:
+            self.recorder.record_end_turn()
+
+    def check_game_over(self) -> bool:
+        if self.player.current_hp <= 0:
+            self.game_over = True
+            self.game_won = False
+        elif self.board.team_size(ENEMY_TEAM) == 0:
+            self.game_over = True
+            self.game_won = True
+        return self.game_over
+
+    def can_attack(self, attacker: Character, target: Character) -> bool:
+        if not attacker.spells:
+            return False
+        spell = list(attacker.spells.values())[0]
+        distance = abs(attacker.position[0] - target.position[0]) + abs(
+            attacker.position[1] - target.position[1]
+        )
+        if not spell.range_min <= distance <= spell.range_max:
+            return False
+        return not spell.requires_los or self.board.has_line_of_sight(
+            attacker.position, target.position
+        )
+
+    def can_attack_player(self, monster: Character) -> bool:
+        return self.can_attack(monster, self.player)
+
+    def take_ai_turn(self, character: Character, target_team: str):
+        """Greedy one-ply turn: hit the nearest target in range, otherwise step towards the team"""
+        target = None
+        if character.spells:
+            spell = list(character.spells.values())[0]
+            in_range = self.board.get_units_in_range(
+                character.position, spell.range_max, [target_team]
+            )
+            in_range.sort(
+                key=lambda t: (
+                    abs(t.position[0] - character.position[0])
+                    + abs(t.position[1] - character.position[1]),
+                    t.unit_id,
+                )
+            )
+            target = next((t for t in in_range if self.can_attack(character, t)), None)
+
+        if target is not None:
+            self.cast_spell(character, spell, target.position)
+        elif character.movement_points > 0:
+            targets = [t.position for t in self.board.get_team(target_team)]
+            if targets:
+                step = self.board.get_next_step(character.position, targets)
+                if step is not None:
+                    self.move_character(character, step)
+
+        self.end_turn()
+
+    def handle_monster_turn(self, monster: Character):
+        if self.monster_ai is not None:
+            self.monster_ai.take_turn(self, monster, self.player.team)
+        else:
+            self.take_ai_turn(monster, self.player.team)
+
+    def run_battle(self, max_turns: int = 500, player_ai=None) -> bool:
+        """Play the battle out with the AI controlling both sides; returns True on a win
+
+        player_ai plays the player's turns (e.g. ai_search.SearchAI); None uses
+        the greedy rule. Pass the same kind of AI as monster_ai to compare
+        the two sides on equal terms.
+        """
+        while not self.check_game_over() and self.current_turn < max_turns:
+            current_char = self.current_character
+            if current_char == self.player:
+                if player_ai is not None:
+                    player_ai.take_turn(self, current_char, ENEMY_TEAM)
+                else:
+                    self.take_ai_turn(current_char, ENEMY_TEAM)
+            else:
+                self.handle_monster_turn(current_char)
+        return self.game_won
@@ -0,0 +1,360 @@
+import argparse
+import json
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from battle_engine import BattleEngine
+from models import ActiveEffects, Character, Effect
+
+# Version 2 can carry the recorder's periodic snapshots; version 1 logs still load
+LOG_VERSION = 2
+
+# Action kinds: (MOVE, slot, x, y), (CAST, slot, spell name, x, y), (END,)
+# where slot is the unit's index in the roster the battle was set up with
+MOVE = "m"
+CAST = "c"
+END = "e"
+
+
+class ActionLog:
+    """Append-only record of the commands of one battle; with its seed, enough to replay it"""
+
+    def __init__(self, seed: int, width: int, height: int, setup: str = "default",
+                 actions: Optional[List[tuple]] = None,
+                 snapshots: Optional[List["Snapshot"]] = None):
+        self.seed = seed
+        self.width = width
+        self.height = height
+        # Tells the replayer how the roster was built, e.g. "default"
+        self.setup = setup
+        self.actions: List[tuple] = actions if actions is not None else []
+        # Periodic snapshots taken while recording, so a replayer can seek without replaying;
+        # only saved on request, as each one holds the full RNG state and dwarfs the actions
+        self.snapshots: List[Snapshot] = snapshots if snapshots is not None else []
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def append(self, action: tuple):
+        self.actions.append(action)
+
+    def to_dict(self, snapshots: bool = False) -> Dict[str, Any]:
+        data = {
+            "version": LOG_VERSION,
+            "seed": self.seed,
+            "width": self.width,
+            "height": self.height,
+            "setup": self.setup,
+            "actions": [list(action) for action in self.actions],
+        }
+        if snapshots:
+            data["snapshots"] = [snapshot.to_dict() for snapshot in self.snapshots]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ActionLog":
+        if data.get("version") not in (1, LOG_VERSION):
+            raise ValueError(f"unsupported action log version {data.get('version')!r}")
+        return cls(
+            data["seed"], data["width"], data["height"], data.get("setup", "default"),
+            [tuple(action) for action in data["actions"]],
+            [Snapshot.from_dict(snapshot) for snapshot in data.get("snapshots", [])],
+        )
+
+    def save(self, path: str, snapshots: bool = False):
+        """Write the log as JSON; snapshots=True keeps the recorded snapshots for instant seeks"""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(snapshots), f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "ActionLog":
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+
+@dataclass
+class Snapshot:
+    """Battle state after `action_index` actions, in roster slots rather than unit ids"""
+
+    action_index: int
+    turn: int
+    # TurnScheduler.get_state() with each unit replaced by its roster slot
+    schedule: tuple
+    # (position, hp, AP, MP) per roster slot, None once the unit left the board
+    units: List[Optional[Tuple[Tuple[int, int], int, int, int]]]
+    effects: List[Optional[ActiveEffects]]
+    obstacles: List[Tuple[int, int]]
+    rng_state: tuple
+    game_over: bool
+    game_won: bool
+    damage_by_spell: Dict[str, int]
+    casts_by_spell: Dict[str, int]
+
+    def same_state(self, other: "Snapshot") -> bool:
+        """Compare the replayable state; effects and the derived game over flags are left out"""
+        return (self.turn, self.schedule, self.units,
+                sorted(self.obstacles), self.rng_state, self.damage_by_spell) == (
+            other.turn, other.schedule, other.units,
+            sorted(other.obstacles), other.rng_state, other.damage_by_spell)
+
+    def to_dict(self) -> Dict[str, Any]:
+        clock, next_order, current, queued = self.schedule
+        version, rng_words, gauss_next = self.rng_state
+        return {
+            "action_index": self.action_index,
+            "turn": self.turn,
+            "schedule": [clock, next_order, current, queued],
+            "units": self.units,
+            "effects": [effects_to_dict(effects) if effects is not None else None for effects in self.effects],
+            "obstacles": self.obstacles,
+            "rng_state": [version, rng_words, gauss_next],
+            "game_over": self.game_over,
+            "game_won": self.game_won,
+            "damage_by_spell": self.damage_by_spell,
+            "casts_by_spell": self.casts_by_spell,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Snapshot":
+        """Inverse of to_dict, rebuilding the tuples JSON turned into lists"""
+        clock, next_order, current, queued = data["schedule"]
+        version, rng_words, gauss_next = data["rng_state"]
+        return cls(
+            action_index=data["action_index"],
+            turn=data["turn"],
+            schedule=(
+                clock,
+                next_order,
+                tuple(current) if current is not None else None,
+                tuple(tuple(entry) for entry in queued),
+            ),
+            units=[
+                ((unit[0][0], unit[0][1]), unit[1], unit[2], unit[3]) if unit is not None else None
+                for unit in data["units"]
+            ],
+            effects=[effects_from_dict(effects) if effects is not None else None for effects in data["effects"]],
+            obstacles=[(x, y) for x, y in data["obstacles"]],
+            rng_state=(version, tuple(rng_words), gauss_next),
+            game_over=data["game_over"],
+            game_won=data["game_won"],
+            damage_by_spell=dict(data["damage_by_spell"]),
+            casts_by_spell=dict(data["casts_by_spell"]),
+        )
+
+
+def effects_to_dict(effects: ActiveEffects) -> Dict[str, Any]:
+    return {
+        "effects": [[token, asdict(effect)] for token, effect in effects.effects.items()],
+        "expiry": effects.expiry,
+        "clock": effects.clock,
+        "sequence": effects.sequence,
+    }
+
+
+def effects_from_dict(data: Dict[str, Any]) -> ActiveEffects:
+    effects = ActiveEffects()
+    for token, fields in data["effects"]:
+        effect = Effect(**fields)
+        effects.effects[token] = effect
+        totals = effects.buffs if effect.type == "buff" else effects.debuffs
+        totals[effect.stat] = totals.get(effect.stat, 0) + effect.value
+    # Already in heap order, since the list was saved as is
+    effects.expiry = [(expires_at, token) for expires_at, token in data["expiry"]]
+    effects.clock = data["clock"]
+    effects.sequence = data["sequence"]
+    return effects
+
+
+def take_snapshot(engine: BattleEngine, roster: List[Character], action_index: int) -> Snapshot:
+    slots = {unit.unit_id: slot for slot, unit in enumerate(roster)}
+    board = engine.board
+    clock, next_order, current, queued = engine.scheduler.get_state()
+    if current is not None:
+        current = (current[0], current[1], slots[current[2].unit_id], current[3])
+    return Snapshot(
+        action_index=action_index,
+        turn=engine.current_turn,
+        schedule=(
+            clock,
+            next_order,
+            current,
+            tuple((at, order, slots[unit.unit_id]) for at, order, unit in queued),
+        ),
+        units=[
+            (unit.position, unit.current_hp, unit.action_points, unit.movement_points)
+            if board.get_unit(unit.unit_id) is unit else None
+            for unit in roster
+        ],
+        effects=[
+            unit.active_effects.copy() if unit.active_effects is not None else None
+            for unit in roster
+        ],
+        obstacles=list(board.obstacles),
+        rng_state=engine.rng.getstate(),
+        game_over=engine.game_over,
+        game_won=engine.game_won,
+        damage_by_spell=dict(engine.damage_by_spell),
+        casts_by_spell=dict(engine.casts_by_spell),
+    )
+
+
+def restore_snapshot(engine: BattleEngine, roster: List[Character], snapshot: Snapshot):
+    board = engine.board
+    for unit in roster:
+        if board.get_unit(unit.unit_id) is unit:
+            board.remove_character(unit.position)
+    for position in list(board.obstacles):
+        board.remove_obstacle(position)
+    for position in snapshot.obstacles:
+        board.add_obstacle(position)
+
+    for unit, state, effects in zip(roster, snapshot.units, snapshot.effects):
+        unit.active_effects = effects.copy() if effects is not None else None
+        if state is None:
+            continue
+        position, unit.current_hp, unit.action_points, unit.movement_points = state
+        board.add_character(unit, position)
+
+    clock, next_order, current, queued = snapshot.schedule
+    if current is not None:
+        current = (current[0], current[1], roster[current[2]], current[3])
+    engine.scheduler.set_state(
+        (clock, next_order, current, [(at, order, roster[slot]) for at, order, slot in queued])
+    )
+    engine.current_turn = snapshot.turn
+    engine.rng.setstate(snapshot.rng_state)
+    engine.game_over = snapshot.game_over
+    engine.game_won = snapshot.game_won
+    engine.damage_by_spell = dict(snapshot.damage_by_spell)
+    engine.casts_by_spell = dict(snapshot.casts_by_spell)
+
+
+class BattleRecorder:
+    """Appends every successful command of an engine to an ActionLog, with periodic snapshots"""
+
+    def __init__(self, engine: BattleEngine, setup: str = "default", snapshot_interval: int = 10):
+        self.engine = engine
+        self.roster = list(engine.combatants)
+        self.slots = {unit.unit_id: slot for slot, unit in enumerate(self.roster)}
+        self.snapshot_interval = snapshot_interval
+        self.log = ActionLog(engine.seed, engine.board.width, engine.board.height, setup)
+        # Shared with the log, so log.save(path, snapshots=True) keeps them for later seeks
+        self.snapshots: List[Snapshot] = self.log.snapshots
+        self.snapshots.append(take_snapshot(engine, self.roster, 0))
+
+    def record_move(self, character: Character, position: Tuple[int, int]):
+        self.log.append((MOVE, self.slots[character.unit_id], position[0], position[1]))
+
+    def record_cast(self, character: Character, spell_name: str, target: Tuple[int, int]):
+        self.log.append((CAST, self.slots[character.unit_id], spell_name, target[0], target[1]))
+
+    def record_end_turn(self):
+        self.log.append((END,))
+        if self.engine.current_turn % self.snapshot_interval == 0:
+            self.snapshots.append(take_snapshot(self.engine, self.roster, len(self.log)))
+
+
+class BattleReplayer:
+    """Re-runs an ActionLog headlessly at full speed and seeks by turn
+
+    Starts from any snapshots saved with the log, and takes more every
+    snapshot_interval turns on the way forward past them, so any seek
+    costs one restore and at most an interval's worth of actions. A log
+    saved without snapshots replays a first seek from the start; that
+    takes milliseconds headlessly, which is why saving them is opt-in.
+    """
+
+    def __init__(
+        self,
+        log: ActionLog,
+        setup: Optional[Callable[[BattleEngine], None]] = None,
+        snapshot_interval: int = 10,
+    ):
+        self.log = log
+        self.engine = BattleEngine(log.width, log.height, seed=log.seed)
+        (setup or BattleEngine.setup_default_battle)(self.engine)
+        self.roster = list(self.engine.combatants)
+        self.snapshot_interval = snapshot_interval
+        self.position = 0
+        self.snapshots: List[Snapshot] = [take_snapshot(self.engine, self.roster, 0)]
+        self.snapshots.extend(snapshot for snapshot in log.snapshots if snapshot.action_index > 0)
+
+    def step(self) -> bool:
+        """Apply the next action; returns False once the log is exhausted"""
+        if self.position >= len(self.log.actions):
+            return False
+        action = self.log.actions[self.position]
+        engine = self.engine
+        kind = action[0]
+        if kind == MOVE:
+            applied = engine.move_character(self.roster[action[1]], (action[2], action[3]))
+        elif kind == CAST:
+            unit = self.roster[action[1]]
+            spell = unit.spells.get(action[2])
+            applied = spell is not None and engine.cast_spell(unit, spell, (action[3], action[4]))
+            engine.check_game_over()
+        elif kind == END:
+            engine.end_turn()
+            applied = True
+        else:
+            raise ValueError(f"unknown action {action!r} at {self.position}")
+        if not applied:
+            raise ValueError(f"replay diverged: action {self.position} {action!r} no longer applies")
+
+        self.position += 1
+        if (
+            kind == END
+            and engine.current_turn % self.snapshot_interval == 0
+            and self.position > self.snapshots[-1].action_index
+        ):
+            self.snapshots.append(take_snapshot(engine, self.roster, self.position))
+        return True
+
+    def run(self) -> BattleEngine:
+        while self.step():
+            pass
+        return self.engine
+
+    def seek(self, turn: int) -> BattleEngine:
+        """Put the engine at the start of the given turn, or at the end of the log if it is shorter"""
+        best = self.snapshots[0]
+        for snapshot in self.snapshots:
+            if snapshot.turn > turn:
+                break
+            best = snapshot
+        # Restore only if that skips ahead of, or goes back from, the current position
+        if self.engine.current_turn > turn or best.action_index > self.position:
+            restore_snapshot(self.engine, self.roster, best)
+            self.position = best.action_index
+        while self.engine.current_turn < turn and self.step():
+            pass
+        return self.engine
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay a recorded battle headlessly")
+    parser.add_argument("log", help="action log written by a recorded battle")
+    parser.add_argument("--turn", type=int, help="stop at the start of this turn instead of the end")
+    args = parser.parse_args(argv)
+
+    log = ActionLog.load(args.log)
+    if log.setup != "default":
+        parser.error(f"don't know how to rebuild a {log.setup!r} battle")
+    replayer = BattleReplayer(log)
+    start = time.perf_counter()
+    engine = replayer.run() if args.turn is None else replayer.seek(args.turn)
+    elapsed = time.perf_counter() - start
+
+    print(f"turn {engine.current_turn}, action {replayer.position}/{len(log)} "
+          f"replayed in {elapsed * 1000:.1f} ms")
+    if engine.current_character is not None:
+        print(f"current: {engine.current_character.name}")
+    for unit in replayer.roster:
+        state = "on board" if engine.board.get_unit(unit.unit_id) is unit else "removed"
+        print(f"  {unit.name:<14} hp {unit.current_hp:>4}  pos {unit.position}  {state}")
+    if engine.game_over:
+        print("won" if engine.game_won else "lost")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,557 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from ai_search import SearchAI
+from battle_engine import BattleEngine
+from batch_simulator import DEFAULT_DATA_PATH, DEFAULT_LAYOUT, random_layout, setup_data_battle
+from frame_profiler import percentile
+from managers.data_manager import DataManager
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Longest accepted request line, in bytes
+MAX_LINE = 64 * 1024
+# Upcoming turns included in every state reply
+TIMELINE_TURNS = 10
+
+
+class CommandError(Exception):
+    """A request that cannot be applied; it is reported to the client and the session carries on"""
+
+
+def battle_state(engine: BattleEngine) -> Dict[str, Any]:
+    """JSON view of a battle; units are referred to by their slot in engine.combatants"""
+    slots = {unit.unit_id: slot for slot, unit in enumerate(engine.combatants)}
+    board = engine.board
+    scheduler = engine.scheduler
+    current = engine.current_character
+    return {
+        "turn": engine.current_turn,
+        "current": slots[current.unit_id] if current is not None else None,
+        "timeline": [slots[unit.unit_id] for unit in scheduler.upcoming(min(len(scheduler), TIMELINE_TURNS))],
+        "game_over": engine.game_over,
+        "game_won": engine.game_won,
+        "units": [
+            {
+                "slot": slot,
+                "name": unit.name,
+                "team": unit.team,
+                "position": list(unit.position),
+                "hp": unit.current_hp,
+                "max_hp": unit.max_hp,
+                "ap": unit.action_points,
+                "mp": unit.movement_points,
+                "alive": board.get_unit(unit.unit_id) is unit,
+            }
+            for slot, unit in enumerate(engine.combatants)
+        ],
+    }
+
+
+def run_monster_turns(engine: BattleEngine, max_turns: int) -> Tuple[int, float]:
+    """Play monster turns until the player is up or the battle ends; returns (turns, seconds)
+
+    Runs on an executor thread. The session awaits it before touching the
+    engine again, so the engine is never used from two threads at once.
+    The thread only keeps the event loop free; the search still holds the
+    GIL, so turns of different sessions do not run in parallel.
+    """
+    start = time.perf_counter()
+    turns = 0
+    while not engine.check_game_over() and engine.current_turn < max_turns:
+        current = engine.current_character
+        if current is engine.player:
+            break
+        engine.handle_monster_turn(current)
+        turns += 1
+    return turns, time.perf_counter() - start
+
+
+def parse_cell(value: Any) -> Tuple[int, int]:
+    if (
+        not isinstance(value, list) or len(value) != 2
+        or not all(isinstance(v, int) and not isinstance(v, bool) for v in value)
+    ):
+        raise CommandError("expected a cell as [x, y]")
+    return value[0], value[1]
+
+
+class Connection:
+    """Writes newline-delimited JSON replies; sessions reply out of order, matched by request id"""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.drain_lock = asyncio.Lock()
+
+    async def send(self, message: Dict[str, Any]):
+        # Each reply is one write call, so replies from different sessions never interleave
+        self.writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+        async with self.drain_lock:
+            await self.writer.drain()
+
+
+class BattleSession:
+    """One battle and the queue of commands it applies strictly in order"""
+
+    def __init__(self, server: "BattleServer", session_id: int, engine: BattleEngine):
+        self.server = server
+        self.session_id = session_id
+        self.engine = engine
+        # Unbounded so "close" always fits; dispatch caps the other commands at queue_size
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+    async def run(self):
+        while True:
+            request, connection = await self.queue.get()
+            if request.get("op") == "close":
+                # Everything queued before the close has been answered by now
+                self.server.sessions.pop(self.session_id, None)
+                self.server.commands += 1
+                try:
+                    await connection.send({"id": request.get("id"), "session": self.session_id, "ok": True})
+                except ConnectionError:
+                    pass
+                return
+            try:
+                reply = await self.apply(request)
+                reply["ok"] = True
+            except CommandError as e:
+                reply = {"ok": False, "error": str(e)}
+            except Exception as e:
+                # Keep serving the session's queue; the client sees the command fail
+                print(f"Session {self.session_id}: error applying {request.get('op')!r}: {e}")
+                reply = {"ok": False, "error": "internal error"}
+            reply["id"] = request.get("id")
+            reply["session"] = self.session_id
+            self.server.commands += 1
+            try:
+                await connection.send(reply)
+            except ConnectionError:
+                pass
+
+    async def apply(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        engine = self.engine
+        if op == "start":
+            await self.play_monsters()
+            return {
+                "state": battle_state(engine),
+                "spells": [
+                    {
+                        "name": spell.name,
+                        "ap_cost": spell.ap_cost,
+                        "range_min": spell.range_min,
+                        "range_max": spell.range_max,
+                    }
+                    for spell in engine.player.spells.values()
+                ],
+            }
+        if op == "state":
+            return {"state": battle_state(engine)}
+        if op not in ("move", "cast", "end_turn"):
+            raise CommandError(f"unknown op {op!r}")
+
+        if engine.game_over:
+            raise CommandError("the battle is over")
+        if engine.current_turn >= self.server.max_turns:
+            raise CommandError("turn limit reached")
+        if engine.current_character is not engine.player:
+            raise CommandError("not the player's turn")
+
+        player = engine.player
+        if op == "move":
+            if not engine.move_character(player, parse_cell(request.get("to"))):
+                raise CommandError("illegal move")
+        elif op == "cast":
+            spell = player.spells.get(request.get("spell"))
+            if spell is None:
+                raise CommandError(f"unknown spell {request.get('spell')!r}")
+            if not engine.cast_spell(player, spell, parse_cell(request.get("target"))):
+                raise CommandError("illegal cast")
+            engine.check_game_over()
+        else:
+            engine.end_turn()
+            await self.play_monsters()
+        return {"state": battle_state(engine)}
+
+    async def play_monsters(self):
+        engine = self.engine
+        if engine.check_game_over() or engine.current_character is engine.player:
+            return
+        loop = asyncio.get_running_loop()
+        turns, seconds = await loop.run_in_executor(
+            self.server.executor, run_monster_turns, engine, self.server.max_turns
+        )
+        self.server.record_ai(turns, seconds)
+
+
+class BattleServer:
+    """Hosts independent rules-only battles behind a newline-delimited JSON protocol over TCP
+
+    Every request is a JSON object on one line with an "op" and an optional
+    "id" echoed in the reply. "new" starts a battle owned by the connection
+    and returns its "session"; "move", "cast", "end_turn", "state" and
+    "close" then name that session. Each session applies its commands in
+    order from its own bounded queue, while sessions run concurrently;
+    "close" waits its turn in that queue, so earlier commands still finish.
+    Monster turns run on a thread pool under a search node budget, so one
+    slow battle never stalls the event loop. The threads give concurrency,
+    not CPU parallelism: they share the GIL. To use more cores, run one
+    server process per core on the same port with reuse_port.
+    """
+
+    def __init__(
+        self,
+        data_path: str = DEFAULT_DATA_PATH,
+        max_sessions: int = 1000,
+        queue_size: int = 32,
+        ai_nodes: int = 2000,
+        max_turns: int = 500,
+        turn_threads: Optional[int] = None,
+    ):
+        self.data = DataManager(data_path)
+        self.max_sessions = max_sessions
+        self.queue_size = queue_size
+        self.ai_nodes = ai_nodes
+        self.max_turns = max_turns
+        self.executor = ThreadPoolExecutor(turn_threads)
+        self.sessions: Dict[int, BattleSession] = {}
+        self.connection_tasks: Set[asyncio.Task] = set()
+        self.next_session_id = 1
+        self.sessions_started = 0
+        self.commands = 0
+        self.ai_turns = 0
+        # Seconds per executor call over the most recent calls
+        self.ai_samples: Deque[float] = deque(maxlen=1000)
+
+    def record_ai(self, turns: int, seconds: float):
+        self.ai_turns += turns
+        self.ai_samples.append(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        samples = sorted(self.ai_samples)
+        return {
+            "sessions": len(self.sessions),
+            "sessions_started": self.sessions_started,
+            "commands": self.commands,
+            "ai_turns": self.ai_turns,
+            "ai_ms_p50": 1000 * percentile(samples, 0.50),
+            "ai_ms_p95": 1000 * percentile(samples, 0.95),
+        }
+
+    def new_session(self, request: Dict[str, Any]) -> BattleSession:
+        if len(self.sessions) >= self.max_sessions:
+            raise CommandError("too many sessions")
+        seed = request.get("seed")
+        if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool)):
+            raise CommandError("seed must be an integer")
+        layout_name = request.get("layout", "default")
+        if layout_name not in ("default", "random"):
+            raise CommandError(f"unknown layout {layout_name!r}")
+
+        engine = BattleEngine(seed=seed)
+        if self.ai_nodes:
+            # A node budget rather than a time budget caps the CPU a turn may take
+            # and keeps seeded battles reproducible however busy the pool is
+            engine.monster_ai = SearchAI(time_budget=None, max_nodes=self.ai_nodes)
+        if layout_name == "random":
+            layout = random_layout(engine.rng, engine.board.width, engine.board.height)
+        else:
+            layout = DEFAULT_LAYOUT
+        setup_data_battle(engine, self.data, layout)
+
+        session = BattleSession(self, self.next_session_id, engine)
+        self.next_session_id += 1
+        self.sessions_started += 1
+        self.sessions[session.session_id] = session
+        session.task = asyncio.get_running_loop().create_task(session.run())
+        return session
+
+    def close_session(self, session_id: int):
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            session.task.cancel()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        connection = Connection(writer)
+        owned: Set[int] = set()
+        task = asyncio.current_task()
+        self.connection_tasks.add(task)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    await connection.send({"id": None, "ok": False, "error": "request too long"})
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = None
+                if not isinstance(request, dict):
+                    await connection.send({"id": None, "ok": False, "error": "expected a JSON object"})
+                    continue
+                await self.dispatch(request, connection, owned)
+        except ConnectionError:
+            pass
+        finally:
+            for session_id in owned:
+                self.close_session(session_id)
+            writer.close()
+            self.connection_tasks.discard(task)
+
+    async def dispatch(self, request: Dict[str, Any], connection: Connection, owned: Set[int]):
+        op = request.get("op")
+        reply: Dict[str, Any] = {"id": request.get("id")}
+        try:
+            if op == "new":
+                session = self.new_session(request)
+                owned.add(session.session_id)
+                # Queued like any command, so monsters that act first run on the executor
+                session.queue.put_nowait(({"op": "start", "id": request.get("id")}, connection))
+                return
+            if op == "stats":
+                reply.update(self.stats(), ok=True)
+            else:
+                session_id = request.get("session")
+                if session_id not in owned:
+                    raise CommandError("unknown session")
+                queue = self.sessions[session_id].queue
+                if op == "close":
+                    # Queued behind the session's pending commands so they still get replies
+                    owned.discard(session_id)
+                elif queue.qsize() >= self.queue_size:
+                    raise CommandError("session busy")
+                queue.put_nowait((request, connection))
+                return
+        except CommandError as e:
+            reply.update(ok=False, error=str(e))
+        await connection.send(reply)
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    reuse_port: bool = False) -> asyncio.AbstractServer:
+        """Listen for clients; with reuse_port, several server processes can share one port"""
+        return await asyncio.start_server(
+            self.handle_connection, host, port, limit=MAX_LINE, reuse_port=reuse_port or None
+        )
+
+    def close(self):
+        for session_id in list(self.sessions):
+            self.close_session(session_id)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class BattleClient:
+    """Client side of the protocol; any number of sessions can share one connection"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.next_id = 1
+        self.reader_task = asyncio.get_running_loop().create_task(self.read_replies())
+
+    @classmethod
+    async def connect(cls, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> "BattleClient":
+        reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+        return cls(reader, writer)
+
+    async def read_replies(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            reply = json.loads(line)
+            future = self.pending.pop(reply.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(reply)
+        for future in self.pending.values():
+            future.set_exception(ConnectionError("server closed the connection"))
+        self.pending.clear()
+
+    async def request(self, op: str, **fields) -> Dict[str, Any]:
+        request_id = self.next_id
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        fields.update(op=op, id=request_id)
+        self.writer.write(json.dumps(fields, separators=(",", ":")).encode() + b"\n")
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.reader_task.cancel()
+
+
+def distance(a: List[int], b: List[int]) -> int:
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+async def play_player_turn(client: BattleClient, session: int, state: Dict[str, Any],
+                           spells: List[Dict[str, Any]], latencies: List[float]) -> Dict[str, Any]:
+    """Simple player: cast at the nearest enemy while possible, step towards it once, end the turn"""
+    moved = False
+    while not state["game_over"]:
+        me = state["units"][state["current"]]
+        enemies = [unit for unit in state["units"] if unit["alive"] and unit["team"] != me["team"]]
+        if not enemies:
+            break
+        target = min(enemies, key=lambda unit: distance(unit["position"], me["position"]))
+        gap = distance(target["position"], me["position"])
+        spell = next(
+            (s for s in spells if s["ap_cost"] <= me["ap"] and s["range_min"] <= gap <= s["range_max"]),
+            None,
+        )
+        if spell is not None:
+            reply = await client.request("cast", session=session, spell=spell["name"], target=target["position"])
+        elif me["mp"] > 0 and not moved:
+            moved = True
+            (x, y), (tx, ty) = me["position"], target["position"]
+            step = [x + (tx > x) - (tx < x), y] if x != tx else [x, y + (ty > y) - (ty < y)]
+            reply = await client.request("move", session=session, to=step)
+        else:
+            break
+        if not reply["ok"]:
+            break
+        state = reply["state"]
+    if state["game_over"]:
+        return state
+
+    start = time.perf_counter()
+    reply = await client.request("end_turn", session=session)
+    latencies.append(time.perf_counter() - start)
+    if not reply["ok"]:
+        raise RuntimeError(f"session {session}: {reply['error']}")
+    return reply["state"]
+
+
+async def play_battle(client: BattleClient, seed: int, layout: str, max_turns: int,
+                      latencies: List[float]) -> Dict[str, Any]:
+    reply = await client.request("new", seed=seed, layout=layout)
+    if not reply["ok"]:
+        raise RuntimeError(reply["error"])
+    session, state = reply["session"], reply["state"]
+    while not state["game_over"] and state["turn"] < max_turns:
+        state = await play_player_turn(client, session, state, reply["spells"], latencies)
+    await client.request("close", session=session)
+    return {"seed": seed, "won": state["game_won"], "finished": state["game_over"], "turns": state["turn"]}
+
+
+async def run_load_test(host: str, port: int, battles: int, connections: int, seed: int,
+                        layout: str, max_turns: int) -> Dict[str, Any]:
+    """Play `battles` battles at once, spread over `connections` connections"""
+    clients = [await BattleClient.connect(host, port) for _ in range(connections)]
+    latencies: List[float] = []
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(
+            play_battle(clients[i % connections], seed + i, layout, max_turns, latencies)
+            for i in range(battles)
+        ))
+        elapsed = time.perf_counter() - start
+        server_stats = await clients[0].request("stats")
+    finally:
+        for client in clients:
+            await client.close()
+
+    latencies.sort()
+    server_stats.pop("id", None)
+    server_stats.pop("ok", None)
+    return {
+        "battles": battles,
+        "connections": connections,
+        "wins": sum(result["won"] for result in results),
+        "unfinished": sum(not result["finished"] for result in results),
+        "seconds": elapsed,
+        "battles_per_second": battles / elapsed if elapsed else 0.0,
+        "end_turn_ms_p50": 1000 * percentile(latencies, 0.50),
+        "end_turn_ms_p95": 1000 * percentile(latencies, 0.95),
+        "end_turn_ms_p99": 1000 * percentile(latencies, 0.99),
+        "server": server_stats,
+    }
+
+
+async def serve(args: argparse.Namespace):
+    server = BattleServer(args.data_path, args.max_sessions, args.queue_size,
+                          args.ai_nodes, args.max_turns, args.turn_threads)
+    listener = await server.start(args.host, args.port, args.reuse_port)
+    print(f"serving battles on {args.host}:{listener.sockets[0].getsockname()[1]}")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+async def client(args: argparse.Namespace) -> Dict[str, Any]:
+    if not args.spawn:
+        return await run_load_test(args.host, args.port, args.battles, args.connections,
+                                   args.seed, args.layout, args.max_turns)
+    # Server and client share this event loop, on a free port
+    server = BattleServer(args.data_path, max(args.max_sessions, args.battles), args.queue_size,
+                          args.ai_nodes, args.max_turns, args.turn_threads)
+    listener = await server.start(args.host, 0)
+    try:
+        return await run_load_test(args.host, listener.sockets[0].getsockname()[1], args.battles,
+                                   args.connections, args.seed, args.layout, args.max_turns)
+    finally:
+        listener.close()
+        # Let the handlers see the clients hang up before the loop goes away
+        if server.connection_tasks:
+            await asyncio.wait(server.connection_tasks, timeout=1)
+        server.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Host many headless battles over a JSON lines protocol")
+    parser.add_argument("mode", choices=["serve", "client"])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--data-path", default=DEFAULT_DATA_PATH)
+    parser.add_argument("--max-sessions", type=int, default=1000)
+    parser.add_argument("--queue-size", type=int, default=32, help="pending commands allowed per session")
+    parser.add_argument(
+        "--ai-nodes", type=int, default=2000,
+        help="search states per monster turn; 0 uses the greedy AI",
+    )
+    parser.add_argument("--max-turns", type=int, default=500)
+    parser.add_argument(
+        "--turn-threads", type=int, default=None,
+        help="threads that run monster turns off the event loop; they share the GIL, "
+        "so use --reuse-port and more processes for more cores",
+    )
+    parser.add_argument(
+        "--reuse-port", action="store_true",
+        help="serve: share the port with other server processes, one per core",
+    )
+    parser.add_argument("-n", "--battles", type=int, default=200, help="client: battles to play at once")
+    parser.add_argument("--connections", type=int, default=10, help="client: connections to share them over")
+    parser.add_argument("--seed", type=int, default=0, help="client: seed of the first battle")
+    parser.add_argument("--layout", choices=["default", "random"], default="default")
+    parser.add_argument("--spawn", action="store_true", help="client: run a server in this process")
+    args = parser.parse_args(argv)
+
+    if args.mode == "serve":
+        try:
+            asyncio.run(serve(args))
+        except KeyboardInterrupt:
+            pass
+        return
+    json.dump(asyncio.run(client(args)), sys.stdout, indent=4)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Rendering benchmarks need no window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ai_search import SearchAI
+from battle_engine import BattleEngine
+from game_board import GameBoard
+from models import Monster, Player
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+# (board side, fraction of cells holding units)
+SCENARIOS = [(10, 0.05), (32, 0.05), (32, 0.25), (96, 0.05), (96, 0.25)]
+QUICK_SCENARIOS = [(10, 0.05), (32, 0.25)]
+OBSTACLE_DENSITY = 0.1
+
+
+def build_battle(engine: BattleEngine, size: int, density: float, seed: int):
+    """Replace the engine's board with a size x size one, scattered with obstacles and monsters"""
+    rng = random.Random(seed)
+    engine.board = GameBoard(size, size)
+    cells = [(x, y) for y in range(size) for x in range(size)]
+    rng.shuffle(cells)
+    obstacles = int(len(cells) * OBSTACLE_DENSITY)
+    units = max(2, int(len(cells) * density))
+    for cell in cells[:obstacles]:
+        engine.board.add_obstacle(cell)
+    unit_cells = cells[obstacles:obstacles + units]
+    player = Player("Hero", unit_cells[0])
+    monsters = [Monster(f"Monster {i}", cell) for i, cell in enumerate(unit_cells[1:], 1)]
+    engine.setup_battle(player, monsters)
+    return rng
+
+
+def free_cells(board: GameBoard) -> List[Tuple[int, int]]:
+    return [
+        (x, y) for y in range(board.height) for x in range(board.width)
+        if not board.is_occupied((x, y))
+    ]
+
+
+def measure(setup: Callable[[], Callable[[], Any]], repeats: int, min_time: float) -> Dict[str, Any]:
+    """Time the callable returned by setup, in microseconds per call
+
+    setup runs outside the timed region before each repeat. Each repeat
+    calls the operation until min_time has passed, so short operations
+    still get a stable mean.
+    """
+    samples = []
+    for _ in range(repeats):
+        operation = setup()
+        calls = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time:
+            operation()
+            calls += 1
+            elapsed = time.perf_counter() - start
+        samples.append(elapsed / calls * 1e6)
+    return {
+        "median_us": statistics.median(samples),
+        "min_us": min(samples),
+        "repeats": repeats,
+    }
+
+
+def bench_get_path(size: int, density: float, seed: int):
+    engine = BattleEngine(seed=seed)
+    rng = build_battle(engine, size, density, seed)
+    board = engine.board
+    cells = free_cells(board)
+    pairs = [(rng.choice(cells), rng.choice(cells)) for _ in range(64)]
+
+    def setup():
+        index = itertools.count()
+
+        def operation():
+            start, end = pairs[next(index) % len(pairs)]
+            board.get_path(start, end)
+        return operation
+    return setup
+
+
+def bench_movable_positions(size: int, density: float, seed: int):
+    engine = BattleEngine(seed=seed)
+    build_battle(engine, size, density, seed)
+    board = engine.board
+    units = engine.all_characters
+
+    def setup():
+        index = itertools.count()
+
+        def operation():
+            # Measure the search, not the per-version cache
+            board.reachable_cache.clear()
+            unit = units[next(index) % len(units)]
+            board.get_movable_positions(unit.position, 6)
+        return operation
+    return setup
+
+
+def bench_monster_turn(size: int, density: float, seed: int, ai: Optional[SearchAI] = None):
+    def setup():
+        engine = BattleEngine(seed=seed)
+        build_battle(engine, size, density, seed)
+        engine.monster_ai = ai
+        # The player only passes, and never dies, so every call is a monster turn
+        engine.player.max_hp = engine.player.current_hp = 10 ** 9
+
+        def operation():
+            character = engine.current_character
+            if character is engine.player:
+                engine.end_turn()
+                character = engine.current_character
+            engine.handle_monster_turn(character)
+        return operation
+    return setup
+
+
+def make_game_manager(size: int, density: float, seed: int):
+    import pygame
+    from game_manager import GameManager
+
+    if not pygame.display.get_init():
+        pygame.display.init()
+    screen = pygame.display.get_surface() or pygame.display.set_mode((800, 800))
+    game = GameManager()
+    build_battle(game, size, density, seed)
+    # Fit the whole board on screen above the spell panel
+    game.CELL_SIZE = max(2, min(60, 620 // size))
+    game.init_pygame(screen)
+    return game
+
+
+def bench_highlight_spell_range(size: int, density: float, seed: int):
+    game = make_game_manager(size, density, seed)
+    spells = list(game.player.spells.values())
+
+    def setup():
+        index = itertools.count()
+
+        def operation():
+            game.board.line_of_sight.clear()
+            game.highlight_spell_range(game.player, spells[next(index) % len(spells)])
+        return operation
+    return setup
+
+
+def bench_draw(size: int, density: float, seed: int, mode: str):
+    game = make_game_manager(size, density, seed)
+    game.highlight_movement_range(game.player)
+    if mode == "immediate":
+        game.render_mode = "immediate"
+
+    def setup():
+        game.invalidate()
+        game.draw()
+        cells = list(game.highlighted_cells) or [game.player.position]
+        index = itertools.count()
+
+        def operation():
+            if mode == "retained":
+                # One hover change per frame, the common interactive case
+                game.hover_cell = cells[next(index) % len(cells)]
+            game.draw()
+        return operation
+    return setup
+
+
+def benchmarks(scenarios: List[Tuple[int, float]], seed: int, render: bool) -> Dict[str, tuple]:
+    """Benchmark name -> (factory, args); factories build their battle only when called"""
+    search_ai = SearchAI(time_budget=None, max_nodes=2000)
+    suite = {}
+    for size, density in scenarios:
+        label = f"{size}x{size}@{int(density * 100)}%"
+        suite[f"get_path/{label}"] = (bench_get_path, (size, density, seed))
+        suite[f"get_movable_positions/{label}"] = (bench_movable_positions, (size, density, seed))
+        suite[f"monster_turn_greedy/{label}"] = (bench_monster_turn, (size, density, seed))
+        suite[f"monster_turn_search/{label}"] = (bench_monster_turn, (size, density, seed, search_ai))
+        if render:
+            suite[f"highlight_spell_range/{label}"] = (bench_highlight_spell_range, (size, density, seed))
+            suite[f"draw_immediate/{label}"] = (bench_draw, (size, density, seed, "immediate"))
+            suite[f"draw_retained/{label}"] = (bench_draw, (size, density, seed, "retained"))
+    return suite
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Names of benchmarks whose median got slower than the baseline by more than threshold"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        ratio = result["median_us"] / previous["median_us"]
+        result["baseline_us"] = previous["median_us"]
+        result["ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time board queries, AI turns and rendering")
+    parser.add_argument("--quick", action="store_true", help="only the small scenarios")
+    parser.add_argument("--filter", default="", help="only benchmarks whose name contains this")
+    parser.add_argument("--no-render", action="store_true", help="skip the pygame benchmarks")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per repeat")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with these results")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="flag medians slower than the baseline by more than this fraction")
+    args = parser.parse_args(argv)
+
+    render = not args.no_render
+    if render:
+        try:
+            import pygame  # noqa: F401
+        except ImportError:
+            print("pygame is not installed, skipping rendering benchmarks")
+            render = False
+
+    scenarios = QUICK_SCENARIOS if args.quick else SCENARIOS
+    baseline: Dict[str, Any] = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f).get("results", {})
+
+    results: Dict[str, Any] = {}
+    for name, (factory, factory_args) in benchmarks(scenarios, args.seed, render).items():
+        if args.filter not in name:
+            continue
+        results[name] = measure(factory(*factory_args), args.repeats, args.min_time)
+    regressions = compare(results, baseline, args.threshold)
+
+    width = max([len(name) for name in results] + [9])
+    for name, result in results.items():
+        line = f"{name:<{width}}  {result['median_us']:>12.1f} us"
+        if "ratio" in result:
+            line += f"  {result['ratio']:>6.2f}x"
+            if name in regressions:
+                line += "  REGRESSION"
+        print(line)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+        "regressions": regressions,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Saved baseline to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+from collections import deque
+from typing import Iterable, Optional, Tuple
+from pathfinding import PathFinder, CELL_OBSTACLE
+
+UNREACHABLE = -1
+
+
+class FlowField:
+    """Distance map from a set of target cells, shared by every unit heading there
+
+    Only obstacles block the flood fill. Units move every turn, so they are
+    checked when a step is read instead of invalidating the whole field.
+    """
+
+    def __init__(self, finder: PathFinder, occupancy: bytearray, targets: Iterable[int]):
+        self.finder = finder
+        self.targets = tuple(sorted(set(targets)))
+        self.distance = [UNREACHABLE] * finder.size
+        self._build(occupancy)
+
+    def _build(self, occupancy: bytearray):
+        distance = self.distance
+        neighbors = self.finder.neighbors
+        queue = deque()
+        for target in self.targets:
+            distance[target] = 0
+            queue.append(target)
+
+        while queue:
+            current = queue.popleft()
+            next_distance = distance[current] + 1
+            for neighbor in neighbors[current]:
+                if distance[neighbor] != UNREACHABLE:
+                    continue
+                if occupancy[neighbor] & CELL_OBSTACLE:
+                    continue
+                distance[neighbor] = next_distance
+                queue.append(neighbor)
+
+    def distance_at(self, position: Tuple[int, int]) -> int:
+        return self.distance[self.finder.index(position)]
+
+    def next_step(self, position: Tuple[int, int], occupancy: bytearray) -> Optional[Tuple[int, int]]:
+        """Return the free neighbor that gets closest to a target, if any gets closer"""
+        finder = self.finder
+        distance = self.distance
+        index = finder.index(position)
+        best = None
+        best_distance = distance[index]
+        if best_distance == UNREACHABLE:
+            return None
+
+        for neighbor in finder.neighbors[index]:
+            neighbor_distance = distance[neighbor]
+            if neighbor_distance == UNREACHABLE or occupancy[neighbor]:
+                continue
+            if neighbor_distance < best_distance:
+                best = neighbor
+                best_distance = neighbor_distance
+
+        return finder.position(best) if best is not None else None
@@ -0,0 +1,133 @@
+import csv
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, List, Tuple
+
+# Phases shown in the on-screen overlay, in order, when they have samples
+OVERLAY_PHASES = ("idle", "events", "monster_turn", "check_game_over", "draw", "tick")
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class FrameProfiler:
+    """Per-frame timings of named phases, with rolling percentiles and trace export
+
+    Sections nest, and a nested section is recorded under its full path, for
+    example "draw/grid". A section entered several times in one frame
+    counts once, with its durations summed. Only the last trace_events
+    sections are kept for export.
+    """
+
+    def __init__(self, window: int = 240, trace_events: int = 100000):
+        self.enabled = True
+        self.window = window
+        # Phase -> per-frame durations in seconds over the last `window` frames
+        self.history: Dict[str, Deque[float]] = {}
+        # (frame, phase, start, duration) with start relative to origin, in seconds
+        self.events: Deque[Tuple[int, str, float, float]] = deque(maxlen=trace_events)
+        self.origin = time.perf_counter()
+        self.frame_index = 0
+        self.frame_start = None
+        self.current: Dict[str, float] = {}
+        self.stack: List[str] = []
+
+    def begin_frame(self):
+        if self.enabled:
+            self.frame_start = time.perf_counter()
+            self.current = {}
+
+    def end_frame(self):
+        if not self.enabled or self.frame_start is None:
+            return
+        end = time.perf_counter()
+        self.current["frame"] = end - self.frame_start
+        self.events.append((self.frame_index, "frame", self.frame_start - self.origin, end - self.frame_start))
+        for phase, duration in self.current.items():
+            samples = self.history.get(phase)
+            if samples is None:
+                samples = self.history[phase] = deque(maxlen=self.window)
+            samples.append(duration)
+        self.frame_index += 1
+        self.frame_start = None
+
+    @contextmanager
+    def section(self, name: str):
+        if not self.enabled or self.frame_start is None:
+            yield
+            return
+        self.stack.append(name)
+        phase = "/".join(self.stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.stack.pop()
+            self.current[phase] = self.current.get(phase, 0.0) + duration
+            self.events.append((self.frame_index, phase, start - self.origin, duration))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Rolling p50/p95/p99/max/mean per phase, in milliseconds"""
+        report = {}
+        for phase, samples in self.history.items():
+            values = sorted(samples)
+            report[phase] = {
+                "p50": 1000 * percentile(values, 0.50),
+                "p95": 1000 * percentile(values, 0.95),
+                "p99": 1000 * percentile(values, 0.99),
+                "max": 1000 * values[-1],
+                "mean": 1000 * sum(values) / len(values),
+                "frames": len(values),
+            }
+        return report
+
+    def overlay_lines(self) -> Tuple[str, ...]:
+        stats = self.stats()
+        lines = [f"{'ms':<16}{'p50':>6}{'p95':>6}"]
+        for phase in ("frame",) + OVERLAY_PHASES:
+            if phase in stats:
+                phase_stats = stats[phase]
+                lines.append(f"{phase:<16}{phase_stats['p50']:6.1f}{phase_stats['p95']:6.1f}")
+        return tuple(lines)
+
+    def reset(self):
+        self.history.clear()
+        self.events.clear()
+
+    def dump_csv(self, path: str):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "phase", "start_ms", "duration_ms"])
+            for frame, phase, start, duration in self.events:
+                writer.writerow([frame, phase, f"{start * 1000:.3f}", f"{duration * 1000:.3f}"])
+
+    def dump_chrome_trace(self, path: str):
+        """Write the trace in the Trace Event format read by chrome://tracing and Perfetto"""
+        events = [
+            {
+                "name": phase.rsplit("/", 1)[-1],
+                "cat": phase,
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": duration * 1e6,
+                "pid": 1,
+                "tid": 1,
+                "args": {"frame": frame},
+            }
+            for frame, phase, start, duration in self.events
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def dump(self, path: str):
+        """Write a CSV for .csv paths, a Chrome trace otherwise"""
+        if path.endswith(".csv"):
+            self.dump_csv(path)
+        else:
+            self.dump_chrome_trace(path)
@@ -1,5 +1,15 @@
-from typing import Dict, Optional, Tuple, List
-from models import Character
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple, List
+from models import Character, Spell
+from pathfinding import PathFinder, CELL_UNIT, CELL_OBSTACLE
+from flow_field import FlowField
+from line_of_sight import LineOfSight
+from zobrist import zobrist_keys
+from area_of_effect import AreaStencils
+
+# Side length, in cells, of the spatial hash buckets used for range queries
+BUCKET_SIZE = 8
+
 
 class GameBoard:
     def __init__(self, width: int, height: int):
@@ -7,6 +17,28 @@ class GameBoard:
         self.height = height
         self.grid: Dict[Tuple[int, int], Optional[Character]] = {}
         self.obstacles: set = set()
+        # Flat mirror of grid/obstacles indexed by y * width + x, used by the hot paths
+        self.occupancy = bytearray(width * height)
+        self.pathfinder = PathFinder(width, height)
+        self.line_of_sight = LineOfSight(self.pathfinder)
+        self.areas = AreaStencils(self.pathfinder)
+        # Bumped whenever obstacles change; flow fields only depend on terrain
+        self.terrain_version = 0
+        self.flow_fields: Dict[Tuple[int, ...], FlowField] = {}
+        self.max_flow_fields = 16
+        # Bumped on every change to units or obstacles
+        self.version = 0
+        self.reachable_cache: Dict[Tuple[Tuple[int, int], int], Dict[Tuple[int, int], int]] = {}
+        # Unit registry: by id, by team and by spatial bucket, kept in sync with grid
+        self.units: Dict[int, Character] = {}
+        self.teams: Dict[str, Dict[int, Character]] = {}
+        self.buckets: Dict[Tuple[int, int], Dict[int, Character]] = {}
+        # Zobrist hash of units, their hp/AP/MP and obstacles, updated incrementally
+        self.hash = 0
+        # unit_id -> order in which the unit first joined this board. Unit
+        # features are keyed on it rather than on the process-wide unit_id,
+        # so identical battles hash alike in any process
+        self.hash_slots: Dict[int, int] = {}
 
     def is_valid_position(self, position: Tuple[int, int]) -> bool:
         x, y = position
@@ -19,10 +51,143 @@ class GameBoard:
         if not self.is_valid_position(position) or self.is_occupied(position):
             return False
         self.grid[position] = character
+        character.position = position
+        self.occupancy[self.pathfinder.index(position)] |= CELL_UNIT
+        self.units[character.unit_id] = character
+        self.teams.setdefault(character.team, {})[character.unit_id] = character
+        self.buckets.setdefault(self._bucket(position), {})[character.unit_id] = character
+        self.hash ^= self._unit_hash(character)
+        character.observer = self
+        self._board_changed(position)
         return True
 
     def remove_character(self, position: Tuple[int, int]) -> Optional[Character]:
-        return self.grid.pop(position, None)
+        character = self.grid.pop(position, None)
+        if character is not None:
+            self.occupancy[self.pathfinder.index(position)] &= ~CELL_UNIT
+            self.units.pop(character.unit_id, None)
+            self.teams.get(character.team, {}).pop(character.unit_id, None)
+            self._remove_from_bucket(character, position)
+            self.hash ^= self._unit_hash(character)
+            character.observer = None
+            self._board_changed(position)
+        return character
+
+    def move_character(self, character: Character, new_position: Tuple[int, int]) -> bool:
+        """Move a unit that is on the board, keeping every index in sync"""
+        old_position = character.position
+        if self.grid.get(old_position) is not character:
+            return False
+        if not self.is_valid_position(new_position) or self.is_occupied(new_position):
+            return False
+
+        del self.grid[old_position]
+        self.grid[new_position] = character
+        character.position = new_position
+        slot = self.hash_slot(character)
+        self.hash ^= zobrist_keys.key(("unit", slot, old_position)) ^ zobrist_keys.key(
+            ("unit", slot, new_position)
+        )
+        finder = self.pathfinder
+        self.occupancy[finder.index(old_position)] &= ~CELL_UNIT
+        self.occupancy[finder.index(new_position)] |= CELL_UNIT
+
+        new_bucket = self._bucket(new_position)
+        if new_bucket != self._bucket(old_position):
+            self._remove_from_bucket(character, old_position)
+            self.buckets.setdefault(new_bucket, {})[character.unit_id] = character
+
+        self._board_changed(old_position)
+        self._board_changed(new_position)
+        return True
+
+    def hash_slot(self, character: Character) -> int:
+        """Stable per-board identity of a unit for hashing; kept if the unit leaves and comes back"""
+        slots = self.hash_slots
+        slot = slots.get(character.unit_id)
+        if slot is None:
+            slot = slots[character.unit_id] = len(slots)
+        return slot
+
+    def _unit_hash(self, character: Character) -> int:
+        slot = self.hash_slot(character)
+        key = zobrist_keys.key
+        return (
+            key(("unit", slot, character.position))
+            ^ key(("current_hp", slot, character.current_hp))
+            ^ key(("action_points", slot, character.action_points))
+            ^ key(("movement_points", slot, character.movement_points))
+        )
+
+    def unit_stat_changed(self, character: Character, stat: str, old, new):
+        """Called by units on this board when their hp, AP or MP change"""
+        key = zobrist_keys.key
+        slot = self.hash_slot(character)
+        self.hash ^= key((stat, slot, old)) ^ key((stat, slot, new))
+
+    def compute_hash(self) -> int:
+        """Recompute the Zobrist hash from scratch; always equal to self.hash"""
+        value = 0
+        for character in self.units.values():
+            value ^= self._unit_hash(character)
+        for position in self.obstacles:
+            value ^= zobrist_keys.key(("obstacle", position))
+        return value
+
+    def _bucket(self, position: Tuple[int, int]) -> Tuple[int, int]:
+        return (position[0] // BUCKET_SIZE, position[1] // BUCKET_SIZE)
+
+    def _remove_from_bucket(self, character: Character, position: Tuple[int, int]):
+        key = self._bucket(position)
+        bucket = self.buckets.get(key)
+        if bucket is not None:
+            bucket.pop(character.unit_id, None)
+            if not bucket:
+                del self.buckets[key]
+
+    def get_unit(self, unit_id: int) -> Optional[Character]:
+        return self.units.get(unit_id)
+
+    def get_units(self) -> List[Character]:
+        return list(self.units.values())
+
+    def get_team(self, team: str) -> List[Character]:
+        return list(self.teams.get(team, {}).values())
+
+    def team_size(self, team: str) -> int:
+        return len(self.teams.get(team, ()))
+
+    def get_units_in_range(
+        self,
+        position: Tuple[int, int],
+        distance: int,
+        teams: Optional[Iterable[str]] = None,
+    ) -> List[Character]:
+        """Get the units within a Manhattan distance of position, optionally limited to some teams"""
+        if teams is not None:
+            teams = set(teams)
+        px, py = position
+        min_bx, min_by = self._bucket((px - distance, py - distance))
+        max_bx, max_by = self._bucket((px + distance, py + distance))
+        result = []
+        buckets = self.buckets
+        for bx in range(min_bx, max_bx + 1):
+            for by in range(min_by, max_by + 1):
+                bucket = buckets.get((bx, by))
+                if not bucket:
+                    continue
+                for unit in bucket.values():
+                    if teams is not None and unit.team not in teams:
+                        continue
+                    ux, uy = unit.position
+                    if abs(ux - px) + abs(uy - py) <= distance:
+                        result.append(unit)
+        return result
+
+    def get_enemies_in_range(self, character: Character, distance: int) -> List[Character]:
+        """Get the units of every other team within distance of character"""
+        teams = [team for team, members in self.teams.items() if team != character.team and members]
+        return self.get_units_in_range(character.position, distance, teams)
 
     def get_character_at(self, position: Tuple[int, int]) -> Optional[Character]:
         return self.grid.get(position)
@@ -31,84 +196,138 @@ class GameBoard:
         if not self.is_valid_position(position) or self.is_occupied(position):
             return False
         self.obstacles.add(position)
+        self.occupancy[self.pathfinder.index(position)] |= CELL_OBSTACLE
+        self.hash ^= zobrist_keys.key(("obstacle", position))
+        self._terrain_changed(position)
         return True
 
     def remove_obstacle(self, position: Tuple[int, int]) -> bool:
         if position in self.obstacles:
             self.obstacles.remove(position)
+            self.occupancy[self.pathfinder.index(position)] &= ~CELL_OBSTACLE
+            self.hash ^= zobrist_keys.key(("obstacle", position))
+            self._terrain_changed(position)
             return True
         return False
 
+    def _board_changed(self, position: Tuple[int, int]):
+        self.version += 1
+        self.reachable_cache.clear()
+        self.line_of_sight.invalidate(self.pathfinder.index(position))
+
+    def _terrain_changed(self, position: Tuple[int, int]):
+        self.terrain_version += 1
+        self.flow_fields.clear()
+        self._board_changed(position)
+
+    def has_line_of_sight(self, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+        """Check that no unit or obstacle stands between two cells"""
+        if not self.is_valid_position(start) or not self.is_valid_position(end):
+            return False
+        finder = self.pathfinder
+        return self.line_of_sight.is_visible(self.occupancy, finder.index(start), finder.index(end))
+
+    def get_visible_positions(self, position: Tuple[int, int], range_min: int, range_max: int) -> List[Tuple[int, int]]:
+        """Get all cells within a range ring that are in line of sight of position"""
+        if not self.is_valid_position(position):
+            return []
+        finder = self.pathfinder
+        cells = self.line_of_sight.visible_cells(
+            self.occupancy, finder.index(position), range_min, range_max
+        )
+        return [finder.position(index) for index in cells]
+
+    def get_area_cells(self, spell: Spell, origin: Tuple[int, int], target: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Cells covered by spell's area when cast from origin onto target"""
+        if not self.is_valid_position(origin) or not self.is_valid_position(target):
+            return []
+        finder = self.pathfinder
+        cells = self.areas.cells(
+            spell.area_of_effect, spell.area_size, finder.index(origin), finder.index(target)
+        )
+        return [finder.position(index) for index in cells]
+
+    def get_units_in_area(self, spell: Spell, origin: Tuple[int, int], target: Tuple[int, int]) -> List[Character]:
+        """Units hit by spell's area when cast from origin onto target, nearest the target first"""
+        if not self.is_valid_position(origin) or not self.is_valid_position(target):
+            return []
+        finder = self.pathfinder
+        cells = self.areas.occupied_cells(
+            self.occupancy, spell.area_of_effect, spell.area_size,
+            finder.index(origin), finder.index(target),
+        )
+        grid = self.grid
+        return [grid[finder.position(index)] for index in cells]
+
     def get_path(self, start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
         """Find a path between two points using A* pathfinding"""
         if not self.is_valid_position(start) or not self.is_valid_position(end):
             return []
-        
+
         if start == end:
             return [start]
-            
-        # A* pathfinding algorithm
-        def heuristic(pos):
-            return abs(pos[0] - end[0]) + abs(pos[1] - end[1])
-            
-        open_set = {start}
-        closed_set = set()
-        came_from = {}
-        g_score = {start: 0}
-        f_score = {start: heuristic(start)}
-        
-        while open_set:
-            current = min(open_set, key=lambda pos: f_score.get(pos, float('inf')))
-            
-            if current == end:
-                path = []
-                while current in came_from:
-                    path.append(current)
-                    current = came_from[current]
-                path.append(start)
-                return path[::-1]
-                
-            open_set.remove(current)
-            closed_set.add(current)
-            
-            # Check all adjacent squares
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                neighbor = (current[0] + dx, current[1] + dy)
-                
-                if not self.is_valid_position(neighbor):
-                    continue
-                    
-                if neighbor in closed_set:
-                    continue
-                    
-                if self.is_occupied(neighbor) and neighbor != end:
-                    continue
-                    
-                tentative_g = g_score[current] + 1
-                
-                if neighbor not in open_set:
-                    open_set.add(neighbor)
-                elif tentative_g >= g_score.get(neighbor, float('inf')):
+
+        finder = self.pathfinder
+        path = finder.find_path(self.occupancy, finder.index(start), finder.index(end))
+        return [finder.position(index) for index in path]
+
+    def get_flow_field(self, targets: List[Tuple[int, int]]) -> FlowField:
+        """Get the shared distance map towards the given target cells"""
+        finder = self.pathfinder
+        key = tuple(sorted(finder.index(pos) for pos in targets if self.is_valid_position(pos)))
+        field = self.flow_fields.get(key)
+        if field is None:
+            if len(self.flow_fields) >= self.max_flow_fields:
+                self.flow_fields.clear()
+            field = FlowField(finder, self.occupancy, key)
+            self.flow_fields[key] = field
+        return field
+
+    def get_next_step(self, position: Tuple[int, int], targets: List[Tuple[int, int]]) -> Optional[Tuple[int, int]]:
+        """Get the next cell to move to in order to approach the nearest target"""
+        if not self.is_valid_position(position):
+            return None
+
+        step = self.get_flow_field(targets).next_step(position, self.occupancy)
+        if step is None and len(targets) == 1:
+            # Units block the downhill cells, fall back to routing around them
+            path = self.get_path(position, targets[0])
+            if len(path) > 1 and not self.is_occupied(path[1]):
+                step = path[1]
+        return step
+
+    def get_reachable(self, position: Tuple[int, int], movement_points: int) -> Dict[Tuple[int, int], int]:
+        """Get every free cell reachable with given movement points, mapped to its path cost"""
+        if not self.is_valid_position(position):
+            return {}
+
+        key = (position, movement_points)
+        reachable = self.reachable_cache.get(key)
+        if reachable is not None:
+            return reachable
+
+        finder = self.pathfinder
+        occupancy = self.occupancy
+        neighbors = finder.neighbors
+        start = finder.index(position)
+        costs = {start: 0}
+        queue = deque([start])
+        while queue:
+            current = queue.popleft()
+            cost = costs[current] + 1
+            if cost > movement_points:
+                continue
+            for neighbor in neighbors[current]:
+                if neighbor in costs or occupancy[neighbor]:
                     continue
-                    
-                came_from[neighbor] = current
-                g_score[neighbor] = tentative_g
-                f_score[neighbor] = g_score[neighbor] + heuristic(neighbor)
-        
-        return []  # No path found
+                costs[neighbor] = cost
+                queue.append(neighbor)
+
+        del costs[start]
+        reachable = {finder.position(index): cost for index, cost in costs.items()}
+        self.reachable_cache[key] = reachable
+        return reachable
 
     def get_movable_positions(self, position: Tuple[int, int], movement_points: int) -> List[Tuple[int, int]]:
         """Get all positions that can be reached with given movement points"""
-        if not self.is_valid_position(position):
-            return []
-            
-        positions = []
-        for x in range(max(0, position[0] - movement_points), 
-                      min(self.width, position[0] + movement_points + 1)):
-            for y in range(max(0, position[1] - movement_points),
-                         min(self.height, position[1] + movement_points + 1)):
-                if (x, y) != position and not self.is_occupied((x, y)):
-                    manhattan_dist = abs(x - position[0]) + abs(y - position[1])
-                    if manhattan_dist <= movement_points:
-                        positions.append((x, y))
-        return positions
+        return list(self.get_reachable(position, movement_points))
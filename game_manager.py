@@ -1,22 +1,53 @@
 import pygame
-import random
-from typing import List, Tuple, Optional, Set
-from models import Character, Player, Monster
-from game_board import GameBoard
-
-
-class GameManager:
-    def __init__(self):
-        self.board = GameBoard(10, 10)
-        self.player: Character = None
-        self.monsters: List[Character] = []
-        self.current_turn = 0
-        self.all_characters = []
+from typing import Callable, List, Tuple, Optional, Set
+from models import Character, Spell
+from battle_engine import BattleEngine
+from ai_search import SearchAI
+from frame_profiler import FrameProfiler
+from managers.text_cache import get_font, render_text
+from managers.audio_manager import AudioManager
+
+
+class GameManager(BattleEngine):
+    """Pygame front end: rendering and input on top of the headless BattleEngine"""
+
+    def __init__(
+        self,
+        audio_manager: Optional[AudioManager] = None,
+        profiler: Optional[FrameProfiler] = None,
+    ):
+        super().__init__(10, 10)
+        self.audio_manager = audio_manager
+        # Per-phase frame timings; F3 toggles the on-screen summary
+        self.profiler = profiler or FrameProfiler()
+        self.show_profiler_overlay = False
+        self.profiler_overlay_lines: Tuple[str, ...] = ()
+        self.PROFILER_OVERLAY_INTERVAL = 30
+        # Upcoming turns listed in the status panel, the current one first
+        self.TIMELINE_TURNS = 10
+        # Monsters plan their whole turn within a frame-sized time budget
+        self.monster_ai = SearchAI(max_depth=4, time_budget=0.05)
         self.selected_spell = None
         self.selected_character = None
-        self.turn_order = []
-        self.current_player_index = 0
         self.highlighted_cells: Set[Tuple[int, int]] = set()
+        self.hover_cell: Optional[Tuple[int, int]] = None
+
+        # "retained" only redraws and updates the regions that changed since the
+        # last frame; "immediate" redraws everything and flips every frame
+        self.render_mode = "retained"
+        self.MAX_DIRTY_RECTS = 32
+        self.static_layer: Optional[pygame.Surface] = None
+        self.highlight_overlay: Optional[pygame.Surface] = None
+        self.highlight_overlay_key = None
+        self.area_cell_surface: Optional[pygame.Surface] = None
+        self.last_render_state = None
+
+        # Frame cap while there is work to do (0 means uncapped). With idle_wait,
+        # run_game blocks on input instead of polling when nothing is pending;
+        # idle_timeout_ms > 0 also wakes it up periodically.
+        self.max_fps = 60
+        self.idle_wait = True
+        self.idle_timeout_ms = 0
 
         self.CELL_SIZE = 60
         self.GRID_OFFSET_X = 50
@@ -30,6 +61,8 @@ class GameManager:
             "selected": (255, 255, 0),
             "highlight_move": (100, 100, 255, 128),
             "highlight_attack": (255, 100, 100, 128),
+            "highlight_area": (255, 200, 0, 140),
+            "hover": (200, 200, 200),
             "spell_panel": (30, 30, 40),
             "text": (255, 255, 255),
             "current_turn": (255, 255, 0),
@@ -40,32 +73,36 @@ class GameManager:
             "win_text": (0, 255, 0),
             "lose_text": (255, 0, 0),
         }
-        self.game_over = False
-        self.game_won = False
 
     def init_pygame(self, screen):
         self.screen = screen
         self.width = screen.get_width()
         self.height = screen.get_height()
-        self.font = pygame.font.Font(None, 24)
+        self.static_layer = None
+        self.highlight_overlay = None
+        self.highlight_overlay_key = None
+        self.area_cell_surface = None
+        self.last_render_state = None
 
-    def setup_game(self, screen):
-        self.init_pygame(screen)
+    # Fonts are loaded on first use so the game-over fonts cost nothing at startup
+    @property
+    def font(self) -> pygame.font.Font:
+        return get_font(24)
 
-        self.player = Player("Hero", (1, 1))
+    @property
+    def title_font(self) -> pygame.font.Font:
+        return get_font(74)
 
-        self.monsters = [
-            Monster("Boss Monster", (8, 8), "boss"),
-            Monster("Monster 1", (7, 7)),
-            Monster("Monster 2", (8, 7)),
-            Monster("Monster 3", (2, 1)),
-        ]
+    @property
+    def subtitle_font(self) -> pygame.font.Font:
+        return get_font(36)
 
-        self.all_characters = [self.player] + self.monsters
-        self.turn_order = self.all_characters.copy()
+    def setup_game(self, screen):
+        self.init_pygame(screen)
 
-        for char in self.all_characters:
-            self.board.add_character(char, char.position)
+        self.setup_default_battle()
+        # Every battle is recorded so it can be replayed with battle_log.py
+        self.start_recording()
 
     def handle_mouse_click(self, pos):
         mouse_x, mouse_y = pos
@@ -74,7 +111,7 @@ class GameManager:
 
         if 0 <= grid_x < self.board.width and 0 <= grid_y < self.board.height:
             clicked_pos = (grid_x, grid_y)
-            current_char = self.turn_order[self.current_player_index]
+            current_char = self.current_character
 
             if current_char == self.player:
                 if self.selected_spell and clicked_pos in self.highlighted_cells:
@@ -87,7 +124,7 @@ class GameManager:
                     self.highlighted_cells.clear()
 
     def handle_key_press(self, key):
-        current_char = self.turn_order[self.current_player_index]
+        current_char = self.current_character
         if current_char == self.player:
             if key == pygame.K_F1:
                 self.end_turn()
@@ -97,7 +134,7 @@ class GameManager:
                 if spell_index < len(current_char.spells):
                     spell_name = list(current_char.spells.keys())[spell_index]
                     spell = current_char.spells[spell_name]
-                    if spell["ap_cost"] <= current_char.action_points:
+                    if spell.ap_cost <= current_char.action_points:
                         self.selected_spell = spell_name
                         self.highlight_spell_range(current_char, spell)
             elif key == pygame.K_ESCAPE:
@@ -112,106 +149,152 @@ class GameManager:
             )
         )
 
-    def highlight_spell_range(self, character: Character, spell: dict):
+    def highlight_spell_range(self, character: Character, spell: Spell):
         self.highlighted_cells.clear()
-        range_val = spell["range"]
-        for x in range(
-            max(0, character.position[0] - range_val),
-            min(self.board.width, character.position[0] + range_val + 1),
-        ):
-            for y in range(
-                max(0, character.position[1] - range_val),
-                min(self.board.height, character.position[1] + range_val + 1),
-            ):
-                if (x, y) != character.position:
-                    distance = abs(x - character.position[0]) + abs(
-                        y - character.position[1]
-                    )
-                    if distance <= range_val:
-                        if spell["requires_target"]:
-                            if self.board.get_character_at((x, y)):
-                                self.highlighted_cells.add((x, y))
-                        else:
-                            self.highlighted_cells.add((x, y))
+        if spell.requires_los:
+            cells = self.board.get_visible_positions(
+                character.position, spell.range_min, spell.range_max
+            )
+        else:
+            x, y = character.position
+            cells = [
+                (x + dx, y + dy)
+                for dx, dy in spell.range_offsets
+                if self.board.is_valid_position((x + dx, y + dy))
+            ]
+
+        for cell in cells:
+            if spell.requires_target:
+                if self.board.get_character_at(cell):
+                    self.highlighted_cells.add(cell)
+            else:
+                self.highlighted_cells.add(cell)
 
     def cast_spell(
-        self, character: Character, spell: dict, target_pos: Tuple[int, int]
+        self, character: Character, spell: Spell, target_pos: Tuple[int, int]
     ) -> bool:
-        if spell["ap_cost"] > character.action_points:
+        if not super().cast_spell(character, spell, target_pos):
             return False
-
-        target = self.board.get_character_at(target_pos)
-        if target:
-            damage = spell.get("damage", 0)
-            target.current_hp -= damage
-            character.action_points -= spell["ap_cost"]
-
-            if target.current_hp <= 0 and target in self.monsters:
-                self.monsters.remove(target)
-                self.board.remove_character(target.position)
-                self.turn_order.remove(target)
-                self.all_characters.remove(target)
-            return True
-        return False
-
-    def move_character(self, character: Character, new_pos: Tuple[int, int]):
-        if character.movement_points > 0:
-            old_pos = character.position
-
-            distance = abs(new_pos[0] - old_pos[0]) + abs(new_pos[1] - old_pos[1])
-            if distance <= character.movement_points:
-                self.board.remove_character(character.position)
-                character.position = new_pos
-                self.board.add_character(character, new_pos)
-                character.movement_points -= distance
+        if self.audio_manager and spell.sound_effect:
+            self.audio_manager.play_sound(spell.sound_effect)
+        return True
 
     def end_turn(self):
-        self.current_player_index = (self.current_player_index + 1) % len(
-            self.turn_order
-        )
-        current_char = self.turn_order[self.current_player_index]
-        current_char.movement_points = current_char.max_movement_points
-        current_char.action_points = current_char.max_action_points
+        super().end_turn()
+        current_char = self.current_character
         self.selected_spell = None
         self.highlighted_cells.clear()
 
         if current_char == self.player:
             self.highlight_movement_range(current_char)
 
-    def draw_grid(self):
-        for x in range(self.board.width):
-            for y in range(self.board.height):
-                rect = pygame.Rect(
-                    self.GRID_OFFSET_X + x * self.CELL_SIZE,
-                    self.GRID_OFFSET_Y + y * self.CELL_SIZE,
-                    self.CELL_SIZE,
-                    self.CELL_SIZE,
+    def cell_rect(self, position: Tuple[int, int]) -> pygame.Rect:
+        return pygame.Rect(
+            self.GRID_OFFSET_X + position[0] * self.CELL_SIZE,
+            self.GRID_OFFSET_Y + position[1] * self.CELL_SIZE,
+            self.CELL_SIZE,
+            self.CELL_SIZE,
+        )
+
+    def unit_rect(self, position: Tuple[int, int]) -> pygame.Rect:
+        # The HP bar sits 10px above the cell
+        rect = self.cell_rect(position)
+        return pygame.Rect(rect.x, rect.y - 10, rect.width, rect.height + 10)
+
+    def get_static_layer(self) -> pygame.Surface:
+        """Background and grid lines, which never change during a battle"""
+        if self.static_layer is None or self.static_layer.get_size() != self.screen.get_size():
+            layer = pygame.Surface(self.screen.get_size()).convert()
+            layer.fill(self.COLORS["background"])
+            for x in range(self.board.width):
+                for y in range(self.board.height):
+                    pygame.draw.rect(layer, self.COLORS["grid"], self.cell_rect((x, y)), 1)
+            self.static_layer = layer
+        return self.static_layer
+
+    def get_highlight_overlay(self) -> pygame.Surface:
+        """Board-sized overlay with every highlighted cell, rebuilt only when the highlights change"""
+        key = (frozenset(self.highlighted_cells), bool(self.selected_spell))
+        if self.highlight_overlay is None or key != self.highlight_overlay_key:
+            overlay = self.highlight_overlay
+            if overlay is None:
+                overlay = pygame.Surface(
+                    (self.board.width * self.CELL_SIZE, self.board.height * self.CELL_SIZE),
+                    pygame.SRCALPHA,
                 )
-                pygame.draw.rect(self.screen, self.COLORS["grid"], rect, 1)
-
-                if (x, y) in self.highlighted_cells:
-                    highlight_surface = pygame.Surface(
-                        (self.CELL_SIZE, self.CELL_SIZE), pygame.SRCALPHA
-                    )
-                    color = (
-                        self.COLORS["highlight_attack"]
-                        if self.selected_spell
-                        else self.COLORS["highlight_move"]
-                    )
-                    pygame.draw.rect(
-                        highlight_surface, color, highlight_surface.get_rect()
-                    )
-                    self.screen.blit(highlight_surface, rect)
-
-    def draw_characters(self):
+            overlay.fill((0, 0, 0, 0))
+            color = (
+                self.COLORS["highlight_attack"]
+                if self.selected_spell
+                else self.COLORS["highlight_move"]
+            )
+            for x, y in key[0]:
+                overlay.fill(
+                    color,
+                    (x * self.CELL_SIZE, y * self.CELL_SIZE, self.CELL_SIZE, self.CELL_SIZE),
+                )
+            self.highlight_overlay = overlay
+            self.highlight_overlay_key = key
+        return self.highlight_overlay
+
+    def area_preview_cells(self) -> List[Tuple[int, int]]:
+        """Cells the selected spell would hit if cast on the hovered cell"""
+        if not self.selected_spell or self.hover_cell not in self.highlighted_cells:
+            return []
+        character = self.current_character
+        spell = character.spells.get(self.selected_spell)
+        if spell is None:
+            return []
+        return self.board.get_area_cells(spell, character.position, self.hover_cell)
+
+    def get_area_cell_surface(self) -> pygame.Surface:
+        if self.area_cell_surface is None or self.area_cell_surface.get_width() != self.CELL_SIZE:
+            surface = pygame.Surface((self.CELL_SIZE, self.CELL_SIZE), pygame.SRCALPHA)
+            surface.fill(self.COLORS["highlight_area"])
+            self.area_cell_surface = surface
+        return self.area_cell_surface
+
+    def update_hover(self, pos: Tuple[int, int]):
+        grid_x = (pos[0] - self.GRID_OFFSET_X) // self.CELL_SIZE
+        grid_y = (pos[1] - self.GRID_OFFSET_Y) // self.CELL_SIZE
+        if self.board.is_valid_position((grid_x, grid_y)):
+            self.hover_cell = (grid_x, grid_y)
+        else:
+            self.hover_cell = None
+
+    def draw_grid(self, area: Optional[pygame.Rect] = None):
+        layer = self.get_static_layer()
+        if area is None:
+            self.screen.blit(layer, (0, 0))
+        else:
+            self.screen.blit(layer, area, area)
+
+        if self.highlighted_cells:
+            # The screen clip limits the blit to area when one is given
+            self.screen.blit(
+                self.get_highlight_overlay(), (self.GRID_OFFSET_X, self.GRID_OFFSET_Y)
+            )
+
+        preview = self.area_preview_cells()
+        if preview:
+            surface = self.get_area_cell_surface()
+            for cell in preview:
+                self.screen.blit(surface, self.cell_rect(cell))
+
+        if self.hover_cell is not None:
+            pygame.draw.rect(self.screen, self.COLORS["hover"], self.cell_rect(self.hover_cell), 2)
+
+    def draw_characters(self, area: Optional[pygame.Rect] = None):
         for char in self.all_characters:
+            if area is not None and not self.unit_rect(char.position).colliderect(area):
+                continue
             x = self.GRID_OFFSET_X + char.position[0] * self.CELL_SIZE
             y = self.GRID_OFFSET_Y + char.position[1] * self.CELL_SIZE
 
             color = (
                 self.COLORS["player"] if char.team == "player" else self.COLORS["enemy"]
             )
-            if char == self.turn_order[self.current_player_index]:
+            if char == self.current_character:
                 pygame.draw.rect(
                     self.screen,
                     self.COLORS["selected"],
@@ -237,158 +320,285 @@ class GameManager:
         )
         pygame.draw.rect(self.screen, self.COLORS["spell_panel"], panel_rect)
 
-        current_char = self.turn_order[self.current_player_index]
+        current_char = self.current_character
         if current_char == self.player:
             x_offset = 10
             for i, (spell_name, spell) in enumerate(current_char.spells.items()):
                 color = (
-                    spell["color"]
+                    spell.color or self.COLORS["selected"]
                     if spell_name == self.selected_spell
                     else self.COLORS["text"]
                 )
-                text = f"{i+1}: {spell_name} (AP: {spell['ap_cost']})"
-                text_surface = self.font.render(text, True, color)
+                text = f"{i+1}: {spell_name} (AP: {spell.ap_cost})"
+                text_surface = render_text(self.font, text, True, color)
                 self.screen.blit(
                     text_surface, (x_offset, self.height - self.SPELL_HEIGHT + 10)
                 )
                 x_offset += text_surface.get_width() + 20
 
     def draw_status_panel(self):
-        current_char = self.turn_order[self.current_player_index]
+        current_char = self.current_character
         status_text = f"AP: {current_char.action_points}/{current_char.max_action_points} | MP: {current_char.movement_points}/{current_char.max_movement_points}"
-        text_surface = self.font.render(status_text, True, self.COLORS["ap_mp"])
+        text_surface = render_text(self.font, status_text, True, self.COLORS["ap_mp"])
         self.screen.blit(text_surface, (10, self.height - self.SPELL_HEIGHT - 30))
 
         y_offset = 10
-        for i, char in enumerate(self.turn_order):
+        for i, char in enumerate(self.turn_timeline()):
             color = (
                 self.COLORS["current_turn"]
-                if i == self.current_player_index
+                if i == 0
                 else self.COLORS["text"]
             )
             text = f"{char.name} - HP: {char.current_hp}/{char.max_hp}"
-            text_surface = self.font.render(text, True, color)
+            text_surface = render_text(self.font, text, True, color)
             self.screen.blit(text_surface, (10, y_offset))
             y_offset += 25
 
+    def turn_timeline(self) -> List[Character]:
+        """Who acts next, from the scheduler lookahead; fast units can show up more than once"""
+        return self.scheduler.upcoming(min(len(self.scheduler), self.TIMELINE_TURNS))
+
     def draw_game_over_screen(self):
 
         bg_rect = pygame.Rect(0, 0, self.width, self.height)
         pygame.draw.rect(self.screen, self.COLORS["game_over_bg"], bg_rect)
 
-        current_char = self.turn_order[self.current_player_index]
+        current_char = self.current_character
         if self.game_won:
             text = "You Win!"
             color = self.COLORS["win_text"]
         else:
             text = "Game Over"
             color = self.COLORS["lose_text"]
-        text_surface = self.font.render(text, True, color)
+        text_surface = render_text(self.font, text, True, color)
         text_rect = text_surface.get_rect(center=(self.width // 2, self.height // 2))
         self.screen.blit(text_surface, text_rect)
 
-    def check_game_over(self):
-        if self.player.current_hp <= 0:
-            self.game_over = True
-            self.game_won = False
-        elif len(self.monsters) == 0:
-            self.game_over = True
-            self.game_won = True
-        return self.game_over
-
     def draw_game_over(self):
 
         overlay = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
         pygame.draw.rect(overlay, self.COLORS["game_over_bg"], overlay.get_rect())
         self.screen.blit(overlay, (0, 0))
 
-        font = pygame.font.Font(None, 74)
         if self.game_won:
-            text = font.render("Victory!", True, self.COLORS["win_text"])
+            text = render_text(self.title_font, "Victory!", True, self.COLORS["win_text"])
         else:
-            text = font.render("Game Over", True, self.COLORS["lose_text"])
+            text = render_text(self.title_font, "Game Over", True, self.COLORS["lose_text"])
 
         text_rect = text.get_rect(center=(self.width // 2, self.height // 2))
         self.screen.blit(text, text_rect)
 
-        font_small = pygame.font.Font(None, 36)
-        restart_text = font_small.render(
-            "Press R to restart", True, self.COLORS["text"]
+        restart_text = render_text(
+            self.subtitle_font, "Press R to restart", True, self.COLORS["text"]
         )
         restart_rect = restart_text.get_rect(
             center=(self.width // 2, self.height // 2 + 50)
         )
         self.screen.blit(restart_text, restart_rect)
 
-    def draw(self):
-        self.screen.fill(self.COLORS["background"])
-        self.draw_grid()
-        self.draw_characters()
-        self.draw_spell_panel()
-        self.draw_status_panel()
+    def capture_render_state(self) -> dict:
+        """Snapshot of everything draw() depends on, compared between frames"""
+        current_char = self.current_character
+        return {
+            "units": {
+                char.position: (char.team, char.current_hp, char.max_hp, char == current_char)
+                for char in self.all_characters
+            },
+            "highlights": frozenset(self.highlighted_cells),
+            "highlight_mode": bool(self.selected_spell),
+            "hover": self.hover_cell,
+            "area": frozenset(self.area_preview_cells()),
+            "status": (
+                current_char.action_points,
+                current_char.max_action_points,
+                current_char.movement_points,
+                current_char.max_movement_points,
+                tuple((char.name, char.current_hp, char.max_hp) for char in self.turn_timeline()),
+            ),
+            "spell_panel": (current_char == self.player, self.selected_spell),
+            "game_over": (self.game_over, self.game_won),
+            "profiler": self.profiler_overlay_lines if self.show_profiler_overlay else None,
+        }
+
+    def collect_dirty_rects(self, old: Optional[dict], new: dict) -> List[pygame.Rect]:
+        """Screen regions whose content differs between two render states"""
+        full = [self.screen.get_rect()]
+        if old is None or old["game_over"] != new["game_over"]:
+            return full
+
+        dirty = []
+        old_units, new_units = old["units"], new["units"]
+        for position in old_units.keys() | new_units.keys():
+            if old_units.get(position) != new_units.get(position):
+                dirty.append(self.unit_rect(position))
+
+        if old["highlight_mode"] != new["highlight_mode"]:
+            changed_cells = old["highlights"] | new["highlights"]
+        else:
+            changed_cells = old["highlights"] ^ new["highlights"]
+        dirty.extend(self.cell_rect(cell) for cell in changed_cells)
+
+        dirty.extend(self.cell_rect(cell) for cell in old["area"] ^ new["area"])
+
+        if old["hover"] != new["hover"]:
+            for cell in (old["hover"], new["hover"]):
+                if cell is not None:
+                    dirty.append(self.cell_rect(cell))
+
+        if old["status"] != new["status"]:
+            lines = max(len(old["status"][-1]), len(new["status"][-1]))
+            dirty.append(pygame.Rect(0, 0, self.width, 10 + 25 * lines))
+            dirty.append(pygame.Rect(0, self.height - self.SPELL_HEIGHT - 30, self.width, 30))
+
+        if old["spell_panel"] != new["spell_panel"]:
+            dirty.append(
+                pygame.Rect(0, self.height - self.SPELL_HEIGHT, self.width, self.SPELL_HEIGHT)
+            )
+
+        if old["profiler"] != new["profiler"]:
+            lines = max(len(old["profiler"] or ()), len(new["profiler"] or ()))
+            dirty.append(self.profiler_overlay_rect(lines))
+
+        if len(dirty) > self.MAX_DIRTY_RECTS:
+            return full
+        return dirty
+
+    def draw_scene(self, area: Optional[pygame.Rect] = None):
+        section = self.profiler.section
+        with section("grid"):
+            self.draw_grid(area)
+        with section("characters"):
+            self.draw_characters(area)
+        with section("panels"):
+            self.draw_spell_panel()
+            self.draw_status_panel()
 
         if self.game_over:
-            self.draw_game_over()
+            with section("game_over"):
+                self.draw_game_over()
+
+        if self.show_profiler_overlay:
+            self.draw_profiler_overlay()
 
-        pygame.display.flip()
+    def profiler_overlay_rect(self, lines: int) -> pygame.Rect:
+        return pygame.Rect(self.width - 250, 0, 250, 8 + 20 * lines)
 
-    def run_game(self):
+    def draw_profiler_overlay(self):
+        lines = self.profiler_overlay_lines
+        if not lines:
+            return
+        rect = self.profiler_overlay_rect(len(lines))
+        pygame.draw.rect(self.screen, self.COLORS["spell_panel"], rect)
+        for i, line in enumerate(lines):
+            text = render_text(get_font(20), line, True, self.COLORS["text"])
+            self.screen.blit(text, (rect.x + 6, 4 + 20 * i))
+
+    def toggle_profiler_overlay(self):
+        self.show_profiler_overlay = not self.show_profiler_overlay
+        self.profiler_overlay_lines = self.profiler.overlay_lines()
+
+    def invalidate(self):
+        """Force the next draw() to repaint the whole screen"""
+        self.last_render_state = None
+
+    def draw(self):
+        if self.render_mode != "retained":
+            self.draw_scene()
+            with self.profiler.section("present"):
+                pygame.display.flip()
+            return
+
+        with self.profiler.section("diff"):
+            state = self.capture_render_state()
+            dirty = self.collect_dirty_rects(self.last_render_state, state)
+        self.last_render_state = state
+        if not dirty:
+            return
+
+        screen_rect = self.screen.get_rect()
+        if len(dirty) == 1 and dirty[0] == screen_rect:
+            self.draw_scene()
+            with self.profiler.section("present"):
+                pygame.display.flip()
+            return
+
+        for rect in dirty:
+            self.screen.set_clip(rect)
+            self.draw_scene(rect)
+        self.screen.set_clip(None)
+        with self.profiler.section("present"):
+            pygame.display.update(dirty)
+
+    def has_pending_work(self) -> bool:
+        """Whether the game needs to advance without waiting for input"""
+        return not self.game_over and self.current_character != self.player
+
+    def wait_for_events(self) -> List[pygame.event.Event]:
+        event = pygame.event.wait(self.idle_timeout_ms)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+
+    def run_game(self, on_first_frame: Optional[Callable[[], None]] = None):
         clock = pygame.time.Clock()
         running = True
 
-        if self.turn_order[0] == self.player:
+        if self.current_character is self.player:
             self.highlight_movement_range(self.player)
+        self.draw()
+        if on_first_frame:
+            on_first_frame()
 
+        profiler = self.profiler
         while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.KEYDOWN:
-                    if self.game_over and event.key == pygame.K_r:
-
-                        self.__init__()
-                        self.setup_game(self.screen)
-                        continue
-                    else:
-                        self.handle_key_press(event.key)
-                elif event.type == pygame.MOUSEBUTTONDOWN and not self.game_over:
-                    if event.button == 1:
-                        self.handle_mouse_click(event.pos)
+            profiler.begin_frame()
+            events = pygame.event.get()
+            if not events and self.idle_wait and not self.has_pending_work():
+                with profiler.section("idle"):
+                    events = self.wait_for_events()
+
+            with profiler.section("events"):
+                for event in events:
+                    if event.type == pygame.QUIT:
+                        running = False
+                    elif event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_F3:
+                            self.toggle_profiler_overlay()
+                        elif self.game_over and event.key == pygame.K_r:
+
+                            show_overlay = self.show_profiler_overlay
+                            self.__init__(self.audio_manager, self.profiler)
+                            self.setup_game(self.screen)
+                            self.show_profiler_overlay = show_overlay
+                            continue
+                        else:
+                            self.handle_key_press(event.key)
+                    elif event.type == pygame.MOUSEMOTION:
+                        self.update_hover(event.pos)
+                    elif event.type == pygame.VIDEOEXPOSE:
+                        self.invalidate()
+                    elif event.type == pygame.MOUSEBUTTONDOWN and not self.game_over:
+                        if event.button == 1:
+                            self.handle_mouse_click(event.pos)
 
             if not self.game_over:
 
-                current_char = self.turn_order[self.current_player_index]
-                if current_char in self.monsters:
-
-                    self.handle_monster_turn(current_char)
-
-                self.check_game_over()
+                current_char = self.current_character
+                if current_char != self.player:
 
-            self.draw()
-            clock.tick(60)
+                    with profiler.section("monster_turn"):
+                        self.handle_monster_turn(current_char)
 
-    def handle_monster_turn(self, monster: Character):
+                with profiler.section("check_game_over"):
+                    self.check_game_over()
 
-        if self.can_attack_player(monster):
-            spell = list(monster.spells.values())[0]
-            self.cast_spell(monster, spell, self.player.position)
-        else:
-
-            if monster.movement_points > 0:
-                path = self.board.get_path(monster.position, self.player.position)
-                if len(path) > 1:
-                    self.move_character(monster, path[1])
-
-        self.end_turn()
-
-    def can_attack_player(self, monster: Character) -> bool:
-        if not monster.spells:
-            return False
-        spell = list(monster.spells.values())[0]
-        distance = abs(monster.position[0] - self.player.position[0]) + abs(
-            monster.position[1] - self.player.position[1]
-        )
-        return distance <= spell["range"]
+            if self.show_profiler_overlay and not profiler.frame_index % self.PROFILER_OVERLAY_INTERVAL:
+                self.profiler_overlay_lines = profiler.overlay_lines()
+            with profiler.section("draw"):
+                self.draw()
+            with profiler.section("tick"):
+                clock.tick(self.max_fps)
+            profiler.end_frame()
 
     def update(self):
         self.check_game_over()
@@ -0,0 +1,63 @@
+from typing import List, Tuple
+from models import Character, Spell
+
+# Action log entry kinds
+MOVE = 0
+CAST = 1
+
+
+class StateLog:
+    """Reversible changes to a battle, so search can branch without copying the state
+
+    Every change goes through the board's own methods, so the occupancy,
+    unit registry and caches stay consistent; undoing replays the inverse
+    operations in reverse order.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.board = engine.board
+        self.entries: List[tuple] = []
+
+    def mark(self) -> int:
+        return len(self.entries)
+
+    def move(self, character: Character, position: Tuple[int, int], cost: int) -> bool:
+        old_position = character.position
+        if not self.board.move_character(character, position):
+            return False
+        character.movement_points -= cost
+        self.entries.append((MOVE, character, old_position, cost))
+        return True
+
+    def cast(self, character: Character, spell: Spell, targets: List[Character], damage: int):
+        """Apply a hit with a fixed damage roll to each target, removing the dead like cast_spell does"""
+        engine = self.engine
+        character.action_points -= spell.ap_cost
+        removed = []
+        for target in targets:
+            target.current_hp -= damage
+        for target in targets:
+            if target.current_hp <= 0 and target is not engine.player:
+                self.board.remove_character(target.position)
+                removed.append((target, engine.scheduler.remove(target)))
+        self.entries.append((CAST, character, spell.ap_cost, targets, damage, removed))
+
+    def undo(self):
+        entry = self.entries.pop()
+        if entry[0] == MOVE:
+            _, character, old_position, cost = entry
+            self.board.move_character(character, old_position)
+            character.movement_points += cost
+        else:
+            _, character, ap_cost, targets, damage, removed = entry
+            for target, scheduled in reversed(removed):
+                self.engine.scheduler.restore(scheduled)
+                self.board.add_character(target, target.position)
+            for target in targets:
+                target.current_hp += damage
+            character.action_points += ap_cost
+
+    def undo_to(self, mark: int):
+        while len(self.entries) > mark:
+            self.undo()
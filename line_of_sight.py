@@ -0,0 +1,114 @@
+from typing import Dict, List, Set, Tuple
+from pathfinding import PathFinder
+
+
+def ray_offsets(dx: int, dy: int) -> Tuple[Tuple[int, int], ...]:
+    """Cells strictly between (0, 0) and (dx, dy) that a center-to-center ray crosses
+
+    A ray passing exactly through a cell corner slips between the two cells
+    touching it, so the result is the same in both directions.
+    """
+    step_x = 1 if dx > 0 else -1
+    step_y = 1 if dy > 0 else -1
+    nx, ny = abs(dx), abs(dy)
+    x = y = 0
+    ix = iy = 0
+    cells = []
+    while ix < nx or iy < ny:
+        decision = (1 + 2 * ix) * ny - (1 + 2 * iy) * nx
+        if decision == 0:
+            x += step_x
+            y += step_y
+            ix += 1
+            iy += 1
+        elif decision < 0:
+            x += step_x
+            ix += 1
+        else:
+            y += step_y
+            iy += 1
+        cells.append((x, y))
+    # The last cell is the target itself
+    return tuple(cells[:-1])
+
+
+class LineOfSight:
+    """Grid raycasting with per-caster visibility caches
+
+    Any occupied cell (unit or obstacle) between caster and target blocks the
+    line. Cached answers remember which cells their ray crossed, so a change
+    to one cell only drops the answers that actually depended on it.
+    """
+
+    def __init__(self, finder: PathFinder):
+        self.finder = finder
+        # Ray templates per relative offset, stored as index deltas
+        self._rays: Dict[Tuple[int, int], Tuple[int, ...]] = {}
+        # origin index -> {target index: visible}
+        self._visibility: Dict[int, Dict[int, bool]] = {}
+        # cell index -> (origin, target) pairs whose ray crosses it
+        self._dependents: Dict[int, Set[Tuple[int, int]]] = {}
+
+    def _ray(self, dx: int, dy: int) -> Tuple[int, ...]:
+        ray = self._rays.get((dx, dy))
+        if ray is None:
+            width = self.finder.width
+            ray = tuple(oy * width + ox for ox, oy in ray_offsets(dx, dy))
+            self._rays[(dx, dy)] = ray
+        return ray
+
+    def is_visible(self, occupancy: bytearray, origin: int, target: int) -> bool:
+        cache = self._visibility.get(origin)
+        if cache is None:
+            cache = self._visibility[origin] = {}
+        visible = cache.get(target)
+        if visible is not None:
+            return visible
+
+        xs, ys = self.finder.xs, self.finder.ys
+        ray = self._ray(xs[target] - xs[origin], ys[target] - ys[origin])
+        visible = True
+        dependents = self._dependents
+        pair = (origin, target)
+        for delta in ray:
+            cell = origin + delta
+            users = dependents.get(cell)
+            if users is None:
+                users = dependents[cell] = set()
+            users.add(pair)
+            if occupancy[cell]:
+                visible = False
+                break
+
+        cache[target] = visible
+        return visible
+
+    def visible_cells(self, occupancy: bytearray, origin: int, range_min: int, range_max: int) -> List[int]:
+        """Indices within the Manhattan ring [range_min, range_max] that origin can see"""
+        finder = self.finder
+        ox, oy = finder.xs[origin], finder.ys[origin]
+        result = []
+        for y in range(max(0, oy - range_max), min(finder.height, oy + range_max + 1)):
+            span = range_max - abs(y - oy)
+            for x in range(max(0, ox - span), min(finder.width, ox + span + 1)):
+                if abs(x - ox) + abs(y - oy) < range_min:
+                    continue
+                target = y * finder.width + x
+                if target == origin or self.is_visible(occupancy, origin, target):
+                    result.append(target)
+        return result
+
+    def invalidate(self, cell: int):
+        """Forget every cached answer whose ray crossed the given cell"""
+        pairs = self._dependents.pop(cell, None)
+        if not pairs:
+            return
+        visibility = self._visibility
+        for origin, target in pairs:
+            cache = visibility.get(origin)
+            if cache is not None:
+                cache.pop(target, None)
+
+    def clear(self):
+        self._visibility.clear()
+        self._dependents.clear()
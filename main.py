@@ -1,19 +1,94 @@
+import time
+
+PROCESS_START = time.perf_counter()
+
+import argparse
+import os
+import sys
 import pygame
+from typing import List, Optional
 from game_manager import GameManager
+from managers.data_manager import DataManager
+from managers.audio_manager import AudioManager
+from managers.sprite_atlas import sprite_atlas
+from startup_profiler import StartupProfiler
+
+IMPORTS_DONE = time.perf_counter()
+
+# Resolved from this file, so the game starts the same from any directory
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(ROOT, "data")
+SOUND_DIR = os.path.join(ROOT, "assets", "sounds")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Python Tactical Combat")
+    parser.add_argument(
+        "--startup-profile",
+        nargs="?",
+        const="-",
+        metavar="PATH",
+        help="print startup phase timings once the first frame is drawn, then exit; "
+        "with PATH, write them there as JSON instead",
+    )
+    parser.add_argument("--record", metavar="PATH", help="save the action log of the last battle on exit")
+    parser.add_argument(
+        "--record-snapshots",
+        action="store_true",
+        help="also save the periodic battle snapshots with --record, for instant seeks in long logs",
+    )
+    parser.add_argument(
+        "--frame-trace",
+        metavar="PATH",
+        help="save per-phase frame timings on exit, as CSV for .csv paths or a Chrome trace otherwise",
+    )
+    args = parser.parse_args(argv)
+
+    profiler = StartupProfiler(PROCESS_START)
+    profiler.record("imports", PROCESS_START, IMPORTS_DONE)
+
+    # Only the display is needed for the first frame; fonts and the mixer
+    # are initialized by their managers on first use
+    with profiler.phase("display init"):
+        pygame.display.init()
+    with profiler.phase("data load"):
+        data = DataManager(DATA_PATH)
+    with profiler.phase("sprite preload queued"):
+        # Decode sprite sheets on a worker thread while the window comes up
+        sprite_atlas.preload(data.get_sprite_sheets())
+    with profiler.phase("window"):
+        screen = pygame.display.set_mode((800, 800))
+        pygame.display.set_caption("Python Tactical Combat")
 
+    with profiler.phase("game setup"):
+        audio = AudioManager(SOUND_DIR)
+        game = GameManager(audio)
+        game.setup_game(screen)
 
-def main():
+    first_frame_start = time.perf_counter()
 
-    pygame.init()
-    screen = pygame.display.set_mode((800, 800))
-    pygame.display.set_caption("Python Tactical Combat")
+    def on_first_frame():
+        profiler.record("first frame", first_frame_start, time.perf_counter())
+        profiler.mark("time to first frame")
+        # Sounds are only needed once the player acts, so open the audio
+        # device and start decoding after the board is on screen
+        with profiler.phase("audio preload queued"):
+            audio.preload_from_data(data.spells_data, data.characters_data)
+        if args.startup_profile:
+            if args.startup_profile == "-":
+                print(profiler.report())
+            else:
+                profiler.dump(args.startup_profile)
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
 
-    game = GameManager()
-    game.setup_game(screen)
-    game.run_game()
+    game.run_game(on_first_frame)
+    if args.record:
+        game.recorder.log.save(args.record, args.record_snapshots)
+    if args.frame_trace:
+        game.profiler.dump(args.frame_trace)
 
     pygame.quit()
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
@@ -1,6 +1,8 @@
 import pygame
 from typing import Dict, List, Tuple, Optional
 import json
+from managers.text_cache import render_text
+from managers.sprite_atlas import sprite_atlas
 
 class AnimationManager:
     def __init__(self):
@@ -10,16 +12,7 @@ class AnimationManager:
 
     def load_sprite_sheet(self, path: str, sprite_size: Tuple[int, int]) -> List[pygame.Surface]:
         try:
-            sheet = pygame.image.load(path).convert_alpha()
-            sprites = []
-            sheet_width = sheet.get_width()
-            sheet_height = sheet.get_height()
-            
-            for y in range(0, sheet_height, sprite_size[1]):
-                for x in range(0, sheet_width, sprite_size[0]):
-                    sprite = sheet.subsurface((x, y, sprite_size[0], sprite_size[1]))
-                    sprites.append(sprite)
-            return sprites
+            return list(sprite_atlas.get_frames(path, sprite_size))
         except Exception as e:
             print(f"Error loading sprite sheet {path}: {e}")
             return []
@@ -48,6 +41,9 @@ class AnimationManager:
     def draw_floating_texts(self, screen: pygame.Surface, font: pygame.font.Font):
         for text in self.floating_texts:
             alpha = 255 * (1 - (pygame.time.get_ticks() - text['start_time']) / text['duration'])
-            text_surface = font.render(text['text'], True, text['color'])
+            text_surface = render_text(font, text['text'], True, text['color'])
+            # The surface is shared through the text cache, so restore its alpha
+            previous_alpha = text_surface.get_alpha()
             text_surface.set_alpha(alpha)
             screen.blit(text_surface, text['pos'])
+            text_surface.set_alpha(previous_alpha)
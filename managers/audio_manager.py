@@ -1,30 +1,185 @@
 import pygame
 import os
-from typing import Dict, Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 class AudioManager:
-    def __init__(self):
-        self.sounds: Dict[str, pygame.mixer.Sound] = {}
+    def __init__(self, sound_dir: str = os.path.join("assets", "sounds"),
+                 budget_bytes: int = 32 * 1024 * 1024, workers: int = 2):
+        # Decoded sounds in least-recently-used order, bounded by budget_bytes
+        self.sounds: "OrderedDict[str, pygame.mixer.Sound]" = OrderedDict()
+        self.sound_sizes: Dict[str, int] = {}
+        self.sound_dir = sound_dir
+        # Every name ever loaded or queued, so an evicted sound can be decoded again
+        self.sound_paths: Dict[str, str] = {}
+        self.budget_bytes = budget_bytes
+        self.bytes_used = 0
+        self.workers = workers
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.pending: Dict[str, Future] = {}
+        self.lock = threading.Lock()
+        # Seconds spent decoding each sound, and from request to ready
+        self.decode_times: List[float] = []
+        self.ready_latencies: List[float] = []
+        self.play_misses = 0
+        self.evictions = 0
         self.music: Optional[str] = None
         self.sound_enabled = True
         self.music_enabled = True
-        pygame.mixer.init()
+        # The mixer is opened on first use; None until tried, False if it failed
+        self.mixer_ready: Optional[bool] = None
+        self.mixer_init_time = 0.0
 
-    def load_sound(self, name: str, file_path: str) -> bool:
+    def ensure_mixer(self) -> bool:
+        """Open the audio device the first time a sound is needed"""
+        if self.mixer_ready is None:
+            with self.lock:
+                if self.mixer_ready is None:
+                    start = time.perf_counter()
+                    try:
+                        if not pygame.mixer.get_init():
+                            pygame.mixer.init()
+                        self.mixer_ready = True
+                    except pygame.error as e:
+                        print(f"Audio disabled: {e}")
+                        self.mixer_ready = False
+                    self.mixer_init_time = time.perf_counter() - start
+        return self.mixer_ready
+
+    def _sound_bytes(self, sound: pygame.mixer.Sound) -> int:
+        frequency, sample_format, channels = pygame.mixer.get_init()
+        return int(sound.get_length() * frequency * channels * (abs(sample_format) // 8))
+
+    def _store(self, name: str, sound: pygame.mixer.Sound):
+        size = self._sound_bytes(sound)
+        with self.lock:
+            if name in self.sounds:
+                self.bytes_used -= self.sound_sizes[name]
+            self.sounds[name] = sound
+            self.sounds.move_to_end(name)
+            self.sound_sizes[name] = size
+            self.bytes_used += size
+            while self.bytes_used > self.budget_bytes and len(self.sounds) > 1:
+                evicted, _ = self.sounds.popitem(last=False)
+                self.bytes_used -= self.sound_sizes.pop(evicted)
+                self.evictions += 1
+
+    def _decode(self, name: str, file_path: str, requested_at: float) -> bool:
+        if not self.ensure_mixer():
+            return False
+        start = time.perf_counter()
         try:
-            if os.path.exists(file_path):
-                self.sounds[name] = pygame.mixer.Sound(file_path)
-                return True
-        except:
+            sound = pygame.mixer.Sound(file_path)
+        except Exception:
             print(f"Failed to load sound: {file_path}")
+            return False
+        finished = time.perf_counter()
+        self._store(name, sound)
+        with self.lock:
+            self.decode_times.append(finished - start)
+            self.ready_latencies.append(finished - requested_at)
+        return True
+
+    def load_sound(self, name: str, file_path: str) -> bool:
+        if os.path.exists(file_path):
+            self.sound_paths[name] = file_path
+            return self._decode(name, file_path, time.perf_counter())
         return False
 
+    def preload(self, sounds: Iterable[Tuple[str, str]]) -> int:
+        """Decode (name, path) pairs on the worker pool; returns how many were queued"""
+        queued = 0
+        for name, file_path in sounds:
+            with self.lock:
+                if name in self.sounds or name in self.pending:
+                    continue
+            if not os.path.exists(file_path):
+                continue
+            self.sound_paths[name] = file_path
+            # Open the device here rather than on a worker thread
+            if not self.ensure_mixer():
+                break
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="audio-preload"
+                )
+            future = self.executor.submit(self._decode, name, file_path, time.perf_counter())
+            with self.lock:
+                self.pending[name] = future
+            future.add_done_callback(lambda _, name=name: self._finish_pending(name))
+            queued += 1
+        return queued
+
+    def _finish_pending(self, name: str):
+        with self.lock:
+            self.pending.pop(name, None)
+
+    def preload_from_data(self, *data: Any) -> int:
+        """Preload every "sound_effect" referenced in the given spell/character data"""
+        names: List[str] = []
+        for entry in data:
+            self._collect_sound_effects(entry, names)
+        return self.preload((name, os.path.join(self.sound_dir, name)) for name in names)
+
+    def _collect_sound_effects(self, data: Any, names: List[str]):
+        if isinstance(data, dict):
+            for key, value in data.items():
+                if key == "sound_effect" and isinstance(value, str):
+                    if value not in names:
+                        names.append(value)
+                else:
+                    self._collect_sound_effects(value, names)
+        elif isinstance(data, list):
+            for value in data:
+                self._collect_sound_effects(value, names)
+
+    def wait_for_preload(self, timeout: Optional[float] = None):
+        with self.lock:
+            futures = list(self.pending.values())
+        for future in futures:
+            future.result(timeout)
+
     def play_sound(self, name: str):
-        if self.sound_enabled and name in self.sounds:
-            self.sounds[name].play()
+        if not self.sound_enabled:
+            return
+        with self.lock:
+            sound = self.sounds.get(name)
+            if sound is not None:
+                self.sounds.move_to_end(name)
+        if sound is not None:
+            sound.play()
+        else:
+            # Never block the frame on a decode; bring an evicted sound back for next time
+            self.play_misses += 1
+            file_path = self.sound_paths.get(name)
+            if file_path is not None:
+                self.preload([(name, file_path)])
+
+    def load_stats(self) -> Dict[str, float]:
+        with self.lock:
+            decode_times = sorted(self.decode_times)
+            latencies = sorted(self.ready_latencies)
+            stats = {
+                "loaded": len(self.sounds),
+                "pending": len(self.pending),
+                "bytes": self.bytes_used,
+                "budget_bytes": self.budget_bytes,
+                "evictions": self.evictions,
+                "play_misses": self.play_misses,
+                "mixer_init_ms": 1000 * self.mixer_init_time,
+            }
+        for label, values in (("decode", decode_times), ("ready", latencies)):
+            if values:
+                stats[f"{label}_ms_avg"] = 1000 * sum(values) / len(values)
+                stats[f"{label}_ms_p95"] = 1000 * values[min(len(values) - 1, int(len(values) * 0.95))]
+                stats[f"{label}_ms_max"] = 1000 * values[-1]
+        return stats
 
     def play_music(self, file_path: str, loop: bool = True):
-        if self.music_enabled and os.path.exists(file_path):
+        if self.music_enabled and os.path.exists(file_path) and self.ensure_mixer():
             try:
                 pygame.mixer.music.load(file_path)
                 pygame.mixer.music.play(-1 if loop else 0)
@@ -33,7 +188,8 @@ class AudioManager:
                 print(f"Failed to play music: {file_path}")
 
     def stop_music(self):
-        pygame.mixer.music.stop()
+        if self.mixer_ready:
+            pygame.mixer.music.stop()
         self.music = None
 
     def toggle_sound(self):
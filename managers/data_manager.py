@@ -1,12 +1,23 @@
 import json
 import os
-from typing import Dict, Any
+import tempfile
+from typing import Dict, Any, List, Optional, Tuple
+from models import Spell
+
+# Bump when the Spell layout or compilation rules change, to discard old caches
+SPELL_TABLE_VERSION = 2
+
 
 class DataManager:
-    def __init__(self, data_path: str):
+    def __init__(self, data_path: str, use_cache: bool = True):
         self.data_path = data_path
+        # Asset paths in the data files are relative to the folder holding data/
+        self.root = os.path.dirname(os.path.abspath(data_path))
+        self.use_cache = use_cache
+        self.spell_cache_path = os.path.join(data_path, 'spells.cache')
         self.characters_data = {}
         self.spells_data = {}
+        self.spell_table: Dict[str, Any] = {"player_spells": {}, "monster_spells": {}}
         self.load_data()
 
     def load_data(self):
@@ -19,6 +30,90 @@ class DataManager:
             print(f"Error loading game data: {e}")
             self.characters_data = {}
             self.spells_data = {}
+        self.load_spell_table()
+
+    def _spells_source_key(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(os.path.join(self.data_path, 'spells.json'))
+        except OSError:
+            return None
+        return (SPELL_TABLE_VERSION, stat.st_mtime_ns, stat.st_size)
+
+    def load_spell_table(self):
+        """Load the compiled spell table from the cache, recompiling if spells.json changed
+
+        The cache is JSON of the compiled Spell fields, so a planted cache file
+        can at worst give wrong spells, never run code.
+        """
+        source_key = self._spells_source_key()
+        if self.use_cache and source_key is not None:
+            try:
+                with open(self.spell_cache_path, 'r') as f:
+                    cached = json.load(f)
+                if cached.get("source") == list(source_key):
+                    self.spell_table = self._table_from_dict(cached["table"])
+                    return
+            except (OSError, ValueError, AttributeError, KeyError, TypeError):
+                pass
+
+        self.spell_table = self.compile_spell_table()
+        if self.use_cache and source_key is not None:
+            self._write_spell_cache({"source": list(source_key), "table": self._table_to_dict()})
+
+    def _write_spell_cache(self, data: Dict[str, Any]):
+        # Write a temporary file and rename it over the cache, so readers never see half a file
+        directory = os.path.dirname(self.spell_cache_path)
+        try:
+            fd, temp_path = tempfile.mkstemp(prefix='.spells.', suffix='.tmp', dir=directory)
+        except OSError as e:
+            print(f"Could not write spell cache {self.spell_cache_path}: {e}")
+            return
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(temp_path, self.spell_cache_path)
+        except OSError as e:
+            print(f"Could not write spell cache {self.spell_cache_path}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def _table_to_dict(self) -> Dict[str, Any]:
+        return {
+            "player_spells": {name: spell.to_dict() for name, spell in self.spell_table["player_spells"].items()},
+            "monster_spells": {
+                monster_type: {name: spell.to_dict() for name, spell in spells.items()}
+                for monster_type, spells in self.spell_table["monster_spells"].items()
+            },
+        }
+
+    def _table_from_dict(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "player_spells": {name: Spell.from_dict(spell) for name, spell in data["player_spells"].items()},
+            "monster_spells": {
+                monster_type: {name: Spell.from_dict(spell) for name, spell in spells.items()}
+                for monster_type, spells in data["monster_spells"].items()
+            },
+        }
+
+    def compile_spell_table(self) -> Dict[str, Any]:
+        table = {
+            "player_spells": self._compile_group(self.spells_data.get("player_spells", {})),
+            "monster_spells": {},
+        }
+        for monster_type, spells in self.spells_data.get("monster_spells", {}).items():
+            table["monster_spells"][monster_type] = self._compile_group(spells)
+        return table
+
+    def _compile_group(self, spells_data: Dict[str, Any]) -> Dict[str, Spell]:
+        compiled = {}
+        for name, data in spells_data.items():
+            try:
+                compiled[name] = Spell.from_data(name, data)
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"Skipping invalid spell {name}: {e}")
+        return compiled
 
     def get_character_data(self, char_type: str, monster_type: str = None) -> Dict[str, Any]:
         if char_type == "player":
@@ -27,8 +122,33 @@ class DataManager:
             return self.characters_data.get("monsters", {}).get(monster_type, {})
         return {}
 
+    def get_sprite_sheets(self) -> List[str]:
+        """Sprite sheet paths referenced by the character data, for preloading"""
+        entries = [self.characters_data.get("player", {})]
+        entries.extend(self.characters_data.get("monsters", {}).values())
+        paths = []
+        for entry in entries:
+            path = entry.get("sprite_sheet")
+            if path:
+                path = self.resolve_path(path)
+                if path not in paths:
+                    paths.append(path)
+        return paths
+
+    def resolve_path(self, path: str) -> str:
+        """Absolute path of an asset named in the data files, whatever the working directory"""
+        return os.path.join(self.root, path)
+
     def get_spells(self, char_type: str, monster_type: str = None) -> Dict[str, Any]:
         if char_type == "player":
             return self.spells_data.get("player_spells", {})
         elif char_type == "monster" and monster_type:
             return self.spells_data.get("monster_spells", {}).get(monster_type, {})
+        return {}
+
+    def get_compiled_spells(self, char_type: str, monster_type: str = None) -> Dict[str, Spell]:
+        if char_type == "player":
+            return self.spell_table["player_spells"]
+        elif char_type == "monster" and monster_type:
+            return self.spell_table["monster_spells"].get(monster_type, {})
+        return {}
@@ -0,0 +1,104 @@
+import os
+import threading
+import pygame
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class SpriteAtlasCache:
+    """Process-wide cache of decoded sprite sheets and the frames cut from them
+
+    Each sheet is decoded once no matter how many units use it. Frames are
+    subsurfaces that share the sheet's pixels, so handing them out is free.
+    Sheets can be decoded ahead of time on a background thread; conversion
+    to the display format happens on first use, on the caller's thread.
+    """
+
+    def __init__(self, workers: int = 2):
+        self.workers = workers
+        self.sheets: Dict[str, pygame.Surface] = {}
+        self.frames: Dict[Tuple[str, Tuple[int, int]], List[pygame.Surface]] = {}
+        self.pending: Dict[str, Future] = {}
+        self.lock = threading.Lock()
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _decode(self, path: str) -> pygame.Surface:
+        return pygame.image.load(path)
+
+    def preload(self, paths: Iterable[str], background: bool = True):
+        """Start decoding sheets before they are needed; missing files are skipped"""
+        for path in paths:
+            with self.lock:
+                if path in self.sheets or path in self.pending or not os.path.exists(path):
+                    continue
+                if background:
+                    if self.executor is None:
+                        self.executor = ThreadPoolExecutor(
+                            max_workers=self.workers, thread_name_prefix="sprite-atlas"
+                        )
+                    self.pending[path] = self.executor.submit(self._decode, path)
+                    continue
+            self.get_sheet(path)
+
+    def get_sheet(self, path: str) -> pygame.Surface:
+        """Get a decoded sheet, converted for fast blitting once a display exists"""
+        with self.lock:
+            sheet = self.sheets.get(path)
+            future = self.pending.pop(path, None)
+        if sheet is not None:
+            self.hits += 1
+            return sheet
+
+        self.misses += 1
+        sheet = future.result() if future is not None else self._decode(path)
+        if pygame.display.get_surface() is not None:
+            sheet = sheet.convert_alpha()
+        with self.lock:
+            # Another thread may have won the race; keep the first copy
+            return self.sheets.setdefault(path, sheet)
+
+    def get_frames(self, path: str, frame_size: Tuple[int, int]) -> List[pygame.Surface]:
+        """All frames of a sheet in row-major order, shared between callers"""
+        key = (path, tuple(frame_size))
+        frames = self.frames.get(key)
+        if frames is not None:
+            self.hits += 1
+            return frames
+
+        sheet = self.get_sheet(path)
+        width, height = frame_size
+        frames = [
+            sheet.subsurface((x, y, width, height))
+            for y in range(0, sheet.get_height() - height + 1, height)
+            for x in range(0, sheet.get_width() - width + 1, width)
+        ]
+        self.frames[key] = frames
+        return frames
+
+    def memory_usage(self) -> Dict[str, int]:
+        # Frames are subsurfaces of the sheets and own no pixels of their own
+        with self.lock:
+            sheet_bytes = sum(
+                sheet.get_bytesize() * sheet.get_width() * sheet.get_height()
+                for sheet in self.sheets.values()
+            )
+            return {
+                "sheets": len(self.sheets),
+                "pending": len(self.pending),
+                "frame_sets": len(self.frames),
+                "frames": sum(len(frames) for frames in self.frames.values()),
+                "bytes": sheet_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def clear(self):
+        with self.lock:
+            self.sheets.clear()
+            self.frames.clear()
+            self.pending.clear()
+
+
+sprite_atlas = SpriteAtlasCache()
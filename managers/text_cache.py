@@ -0,0 +1,94 @@
+import pygame
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+
+class TextCache:
+    """LRU cache of rendered text surfaces, bounded by entry count and bytes
+
+    Returned surfaces are shared between callers and must not be modified;
+    callers that need per-blit alpha should restore it after blitting.
+    """
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, max_entries: int = 4096):
+        self.surfaces: "OrderedDict[tuple, pygame.Surface]" = OrderedDict()
+        self.sizes: Dict[tuple, int] = {}
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(
+        self,
+        font: pygame.font.Font,
+        text: str,
+        antialias: bool,
+        color: Tuple[int, ...],
+    ) -> pygame.Surface:
+        key = (font, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        size = surface.get_bytesize() * surface.get_width() * surface.get_height()
+        self.surfaces[key] = surface
+        self.sizes[key] = size
+        self.bytes_used += size
+        self._evict()
+        return surface
+
+    def _evict(self):
+        # Always keep the newest entry, even if it alone exceeds the budget
+        while len(self.surfaces) > 1 and (
+            self.bytes_used > self.max_bytes or len(self.surfaces) > self.max_entries
+        ):
+            key, _ = self.surfaces.popitem(last=False)
+            self.bytes_used -= self.sizes.pop(key)
+            self.evictions += 1
+
+    def clear(self):
+        self.surfaces.clear()
+        self.sizes.clear()
+        self.bytes_used = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.surfaces),
+            "bytes": self.bytes_used,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Shared by the game manager, animation manager and UI manager
+text_cache = TextCache()
+
+
+def render_text(
+    font: pygame.font.Font, text: str, antialias: bool, color: Tuple[int, ...]
+) -> pygame.Surface:
+    return text_cache.render(font, text, antialias, color)
+
+
+_fonts: Dict[Tuple[object, int], pygame.font.Font] = {}
+
+
+def get_font(size: int, name=None) -> pygame.font.Font:
+    """Load a font on first use, initializing pygame.font only when text is first needed"""
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = _fonts[key] = pygame.font.Font(name, size)
+    return font
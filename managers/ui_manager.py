@@ -1,13 +1,21 @@
 import pygame
 from typing import Dict, List, Tuple, Optional
 import json
+from managers.text_cache import get_font, render_text
+from models import Spell
+
+
+def format_range(low: int, high: int) -> str:
+    """Single number for fixed values, "min-max" for rolled ones"""
+    return str(low) if low == high else f"{low}-{high}"
+
 
 class UIManager:
     def __init__(self, screen: pygame.Surface, font_size: int = 24):
         self.screen = screen
         self.width = screen.get_width()
         self.height = screen.get_height()
-        self.font = pygame.font.Font(None, font_size)
+        self.font = get_font(font_size)
         self.hover_timer = 0
         self.hover_delay = 500  # milliseconds
         self.last_hover_pos = None
@@ -38,7 +46,7 @@ class UIManager:
 
     def create_tooltip(self, text: str, pos: Tuple[int, int], padding: int = 5) -> pygame.Surface:
         lines = text.split('\n')
-        line_surfaces = [self.font.render(line, True, self.COLORS["text"]) for line in lines]
+        line_surfaces = [render_text(self.font, line, True, self.COLORS["text"]) for line in lines]
         
         # Calculate tooltip dimensions
         width = max(surface.get_width() for surface in line_surfaces) + padding * 2
@@ -85,16 +93,16 @@ class UIManager:
             
         self.screen.blit(self.tooltip_surface, (tooltip_x, tooltip_y))
 
-    def draw_spell_tooltip(self, spell: dict, pos: Tuple[int, int]):
-        damage_str = f"Damage: {spell['damage']}" if 'damage' in spell else ""
-        healing_str = f"Healing: {spell['healing']}" if 'healing' in spell else ""
+    def draw_spell_tooltip(self, spell: Spell, pos: Tuple[int, int]):
+        damage_str = f"Damage: {format_range(spell.damage_min, spell.damage_max)}" if spell.damage_max else ""
+        healing_str = f"Healing: {format_range(spell.healing_min, spell.healing_max)}" if spell.healing_max else ""
         
         tooltip_text = (
-            f"{spell['name']}\n"
-            f"AP Cost: {spell['ap_cost']}\n"
-            f"Range: {spell['range']}\n"
+            f"{spell.name}\n"
+            f"AP Cost: {spell.ap_cost}\n"
+            f"Range: {spell.range_max}\n"
             f"{damage_str}\n{healing_str}\n"
-            f"{spell['description']}"
+            f"{spell.description}"
         )
         
         self.tooltip_surface = self.create_tooltip(tooltip_text, pos)
@@ -1,6 +1,16 @@
-from typing import Dict, List, Tuple, Optional
+import heapq
+import itertools
+from typing import Any, Dict, List, Tuple, Optional, TYPE_CHECKING
 from dataclasses import dataclass
-import pygame
+
+# pygame is only needed for sprites; keep it out of the import path of the
+# headless battle engine
+if TYPE_CHECKING:
+    import pygame
+
+
+# Process-wide unit ids, used as keys by the GameBoard unit registry
+_unit_ids = itertools.count(1)
 
 
 @dataclass
@@ -13,19 +23,243 @@ class Effect:
     source: str  # name of the character who applied the effect
 
 
-@dataclass
+class ActiveEffects:
+    """Effects on one unit with per-stat totals kept up to date as effects come and go
+
+    Every application gets its own token, so the same Effect applied twice
+    counts twice and expires twice, like the old effect list. Expiry is
+    driven by a heap ordered on the turn each application runs out, so
+    neither lookups nor turn starts walk the whole effect list.
+    """
+
+    __slots__ = ("effects", "buffs", "debuffs", "expiry", "clock", "sequence")
+
+    def __init__(self):
+        # Application token -> effect, oldest application first
+        self.effects: Dict[int, Effect] = {}
+        self.buffs: Dict[str, int] = {}
+        self.debuffs: Dict[str, int] = {}
+        # (expires_at, token) entries; removed applications are skipped lazily
+        self.expiry: List[Tuple[int, int]] = []
+        self.clock = 0
+        self.sequence = 0
+
+    def add(self, effect: Effect) -> int:
+        """Apply an effect; returns the token of this application"""
+        self.sequence += 1
+        self.effects[self.sequence] = effect
+        totals = self.buffs if effect.type == "buff" else self.debuffs
+        totals[effect.stat] = totals.get(effect.stat, 0) + effect.value
+        # Matches the old list semantics: an effect survives `duration` turn starts
+        heapq.heappush(self.expiry, (self.clock + effect.duration + 1, self.sequence))
+        return self.sequence
+
+    def remove(self, effect: Effect):
+        """Remove the oldest application of an effect equal to the given one"""
+        for token, active in self.effects.items():
+            if active == effect:
+                self._drop(token)
+                return
+        raise ValueError("effect is not active")
+
+    def _drop(self, token: int):
+        effect = self.effects.pop(token)
+        totals = self.buffs if effect.type == "buff" else self.debuffs
+        totals[effect.stat] -= effect.value
+
+    def tick(self):
+        self.clock += 1
+        expiry = self.expiry
+        while expiry and expiry[0][0] <= self.clock:
+            _, token = heapq.heappop(expiry)
+            if token in self.effects:
+                self._drop(token)
+
+    def copy(self) -> "ActiveEffects":
+        """Independent copy sharing the (never mutated) Effect records"""
+        copied = ActiveEffects()
+        copied.effects = dict(self.effects)
+        copied.buffs = dict(self.buffs)
+        copied.debuffs = dict(self.debuffs)
+        copied.expiry = list(self.expiry)
+        copied.clock = self.clock
+        copied.sequence = self.sequence
+        return copied
+
+
+AREA_SHAPES = ("single", "cross", "circle", "line", "cone")
+
+
+def parse_value_range(value, field: str, spell_name: str) -> Tuple[int, int]:
+    """Parse an int or a "min-max" string such as "20-25" into (min, max)"""
+    if isinstance(value, bool):
+        raise ValueError(f"{spell_name}: {field} must be a number or a 'min-max' range")
+    if isinstance(value, int):
+        low = high = value
+    else:
+        low_text, _, high_text = str(value).partition("-")
+        try:
+            low = int(low_text)
+            high = int(high_text) if high_text else low
+        except ValueError:
+            raise ValueError(f"{spell_name}: invalid {field} {value!r}") from None
+    if low < 0 or high < low:
+        raise ValueError(f"{spell_name}: invalid {field} {value!r}")
+    return low, high
+
+
 class Spell:
-    name: str
-    ap_cost: int
-    range_min: int
-    range_max: int
-    requires_los: bool
-    effect_type: str
-    effect_value: int
-    area_of_effect: str
+    """Compiled spell record
+
+    Built once from the data files or the class spell tables, so hot paths
+    read plain attributes instead of parsing strings or looking up dict keys.
+    """
+
+    __slots__ = (
+        "name",
+        "ap_cost",
+        "range_min",
+        "range_max",
+        "requires_los",
+        "requires_target",
+        "effect_type",
+        "damage_min",
+        "damage_max",
+        "healing_min",
+        "healing_max",
+        "dot_damage",
+        "defense",
+        "push_strength",
+        "area_of_effect",
+        "area_size",
+        "color",
+        "description",
+        "sound_effect",
+        "range_offsets",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        ap_cost: int,
+        range_max: int,
+        range_min: Optional[int] = None,
+        requires_los: bool = False,
+        requires_target: bool = True,
+        effect_type: str = "damage",
+        damage: Tuple[int, int] = (0, 0),
+        healing: Tuple[int, int] = (0, 0),
+        dot_damage: int = 0,
+        defense: int = 0,
+        push_strength: int = 0,
+        area_of_effect: str = "single",
+        area_size: int = 0,
+        color: Optional[Tuple[int, int, int]] = None,
+        description: str = "",
+        sound_effect: Optional[str] = None,
+    ):
+        self.name = name
+        self.ap_cost = ap_cost
+        self.range_max = range_max
+        # A range of 0 is a self-cast; anything else starts at the adjacent cells
+        self.range_min = range_min if range_min is not None else min(1, range_max)
+        self.requires_los = requires_los
+        self.requires_target = requires_target
+        self.effect_type = effect_type
+        self.damage_min, self.damage_max = damage
+        self.healing_min, self.healing_max = healing
+        self.dot_damage = dot_damage
+        self.defense = defense
+        self.push_strength = push_strength
+        self.area_of_effect = area_of_effect
+        self.area_size = area_size
+        self.color = color
+        self.description = description
+        self.sound_effect = sound_effect
+        # Relative cells the spell can target, nearest ring first
+        self.range_offsets: Tuple[Tuple[int, int], ...] = tuple(
+            (dx, dy)
+            for distance in range(self.range_min, self.range_max + 1)
+            for dx in range(-distance, distance + 1)
+            for dy in sorted({distance - abs(dx), abs(dx) - distance})
+        )
+
+    def __repr__(self) -> str:
+        return f"Spell({self.name!r}, ap_cost={self.ap_cost}, range={self.range_min}-{self.range_max})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Constructor arguments that rebuild this spell, as plain JSON values"""
+        return {
+            "name": self.name,
+            "ap_cost": self.ap_cost,
+            "range_max": self.range_max,
+            "range_min": self.range_min,
+            "requires_los": self.requires_los,
+            "requires_target": self.requires_target,
+            "effect_type": self.effect_type,
+            "damage": [self.damage_min, self.damage_max],
+            "healing": [self.healing_min, self.healing_max],
+            "dot_damage": self.dot_damage,
+            "defense": self.defense,
+            "push_strength": self.push_strength,
+            "area_of_effect": self.area_of_effect,
+            "area_size": self.area_size,
+            "color": list(self.color) if self.color is not None else None,
+            "description": self.description,
+            "sound_effect": self.sound_effect,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Spell":
+        """Inverse of to_dict; the fields were validated when the spell was first compiled"""
+        fields = dict(data)
+        fields["damage"] = tuple(fields["damage"])
+        fields["healing"] = tuple(fields["healing"])
+        if fields["color"] is not None:
+            fields["color"] = tuple(fields["color"])
+        return cls(**fields)
+
+    @classmethod
+    def from_data(cls, name: str, data: dict) -> "Spell":
+        """Validate one spell entry (JSON or class table format) and compile it"""
+        name = data.get("name", name)
+        for field in ("ap_cost", "range"):
+            value = data.get(field)
+            if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+                raise ValueError(f"{name}: {field} must be a non-negative integer")
+
+        area = data.get("area_of_effect", "single")
+        if area not in AREA_SHAPES:
+            raise ValueError(f"{name}: unknown area_of_effect {area!r}")
+
+        color = data.get("color")
+        if color is not None:
+            if len(color) != 3 or not all(isinstance(c, int) and 0 <= c <= 255 for c in color):
+                raise ValueError(f"{name}: color must be three 0-255 integers")
+            color = tuple(color)
+
+        return cls(
+            name=name,
+            ap_cost=data["ap_cost"],
+            range_max=data["range"],
+            range_min=data.get("range_min"),
+            requires_los=bool(data.get("requires_los", False)),
+            requires_target=bool(data.get("requires_target", True)),
+            effect_type=data.get("effect_type", "damage"),
+            damage=parse_value_range(data.get("damage", 0), "damage", name),
+            healing=parse_value_range(data.get("healing", 0), "healing", name),
+            dot_damage=data.get("dot_damage", 0),
+            defense=data.get("defense", 0),
+            push_strength=data.get("push_strength", 0),
+            area_of_effect=area,
+            area_size=data.get("area_size", 0 if area == "single" else 1),
+            color=color,
+            description=data.get("description", ""),
+            sound_effect=data.get("sound_effect"),
+        )
 
     def can_cast(self, caster: "Character", target_pos: Tuple[int, int]) -> bool:
-        if caster.ap < self.ap_cost:
+        if caster.action_points < self.ap_cost:
             return False
         distance = abs(caster.position[0] - target_pos[0]) + abs(
             caster.position[1] - target_pos[1]
@@ -33,71 +267,146 @@ class Spell:
         return self.range_min <= distance <= self.range_max
 
 
+def compile_spells(spells_data: Dict[str, dict]) -> Dict[str, Spell]:
+    return {name: Spell.from_data(name, data) for name, data in spells_data.items()}
+
+
 class Character:
+    # Battles can hold thousands of units, so skip the per-instance __dict__
+    __slots__ = (
+        "unit_id",
+        "name",
+        "team",
+        "position",
+        "max_hp",
+        "_current_hp",
+        "max_movement_points",
+        "_movement_points",
+        "max_action_points",
+        "_action_points",
+        "initiative",
+        "spells",
+        "sprite_sheet_path",
+        "sprite_size",
+        "current_sprites",
+        "current_animation",
+        "animation_frame",
+        "active_effects",
+        "observer",
+    )
+
+    # Spell tables are shared by every unit of a class; replace, don't mutate
+    SPELLS: Dict[str, Spell] = {}
+
     def __init__(self, name: str, team: str, position: Tuple[int, int]):
+        self.unit_id = next(_unit_ids)
         self.name = name
         self.team = team
         self.position = position
+        # Notified of hp/AP/MP changes while the unit is on a board (see GameBoard.unit_stat_changed)
+        self.observer = None
         self.max_hp = 100
-        self.current_hp = self.max_hp
+        self._current_hp = self.max_hp
         self.max_movement_points = 3
-        self.movement_points = self.max_movement_points
+        self._movement_points = self.max_movement_points
         self.max_action_points = 5
-        self.action_points = self.max_action_points
-        self.spells: Dict[str, dict] = {}
+        self._action_points = self.max_action_points
+        # Turn frequency for the TurnScheduler; twice the initiative, twice the turns
+        self.initiative = 10
+        self.spells: Dict[str, Spell] = self.SPELLS
 
         # New attributes
         self.sprite_sheet_path: Optional[str] = None
         self.sprite_size: Tuple[int, int] = (32, 32)
-        self.current_sprites: Dict[str, List[pygame.Surface]] = {}
+        # Only allocated once sprites are loaded
+        self.current_sprites: Optional[Dict[str, List["pygame.Surface"]]] = None
         self.current_animation: str = "idle"
         self.animation_frame = 0
-        self.effects: List[Effect] = []
+        # Only allocated once the first effect is applied
+        self.active_effects: Optional[ActiveEffects] = None
+
+    @property
+    def current_hp(self) -> int:
+        return self._current_hp
+
+    @current_hp.setter
+    def current_hp(self, value: int):
+        old = self._current_hp
+        self._current_hp = value
+        if self.observer is not None and value != old:
+            self.observer.unit_stat_changed(self, "current_hp", old, value)
+
+    @property
+    def movement_points(self) -> int:
+        return self._movement_points
+
+    @movement_points.setter
+    def movement_points(self, value: int):
+        old = self._movement_points
+        self._movement_points = value
+        if self.observer is not None and value != old:
+            self.observer.unit_stat_changed(self, "movement_points", old, value)
+
+    @property
+    def action_points(self) -> int:
+        return self._action_points
+
+    @action_points.setter
+    def action_points(self, value: int):
+        old = self._action_points
+        self._action_points = value
+        if self.observer is not None and value != old:
+            self.observer.unit_stat_changed(self, "action_points", old, value)
 
     @property
     def is_alive(self) -> bool:
         return self.current_hp > 0
 
+    @property
+    def effects(self) -> List[Effect]:
+        if self.active_effects is None:
+            return []
+        return list(self.active_effects.effects.values())
+
     def take_damage(self, amount: int) -> int:
         # Calculate actual damage after effects
-        for effect in self.effects:
-            if effect.type == "buff" and effect.stat == "defense":
-                amount = max(0, amount - effect.value)
+        if self.active_effects is not None:
+            amount = max(0, amount - self.active_effects.buffs.get("defense", 0))
 
         self.current_hp = max(0, self.current_hp - amount)
         return amount
 
     def heal(self, amount: int) -> int:
         # Calculate actual healing after effects
-        for effect in self.effects:
-            if effect.type == "buff" and effect.stat == "healing":
-                amount = amount + effect.value
+        if self.active_effects is not None:
+            amount = amount + self.active_effects.buffs.get("healing", 0)
 
         old_hp = self.current_hp
         self.current_hp = min(self.max_hp, self.current_hp + amount)
         return self.current_hp - old_hp
 
     def add_effect(self, effect: Effect):
-        self.effects.append(effect)
+        if self.active_effects is None:
+            self.active_effects = ActiveEffects()
+        self.active_effects.add(effect)
 
     def remove_effect(self, effect: Effect):
-        self.effects.remove(effect)
+        if self.active_effects is None:
+            raise ValueError("effect is not active")
+        self.active_effects.remove(effect)
 
     def update_effects(self):
-        # Update effect durations and remove expired effects
-        self.effects = [effect for effect in self.effects if effect.duration > 0]
-        for effect in self.effects:
-            effect.duration -= 1
+        # Advance effect durations and remove expired effects
+        if self.active_effects is not None:
+            self.active_effects.tick()
 
     def get_stat_with_effects(self, stat: str) -> int:
         base_value = getattr(self, f"max_{stat}", 0)
-        for effect in self.effects:
-            if effect.stat == stat:
-                if effect.type == "buff":
-                    base_value += effect.value
-                else:  # debuff
-                    base_value = max(0, base_value - effect.value)
-        return base_value
+        if self.active_effects is None:
+            return base_value
+        # Debuffs are applied after all buffs, then the total is floored at 0
+        base_value += self.active_effects.buffs.get(stat, 0)
+        return max(0, base_value - self.active_effects.debuffs.get(stat, 0))
 
     def start_turn(self) -> None:
         self.update_effects()
@@ -108,20 +417,20 @@ class Character:
         if not self.sprite_sheet_path:
             return
 
+        from managers.sprite_atlas import sprite_atlas
+
         try:
-            sheet = pygame.image.load(self.sprite_sheet_path).convert_alpha()
+            # Frames are shared with every other unit using the same sheet
+            sheet_frames = sprite_atlas.get_frames(self.sprite_sheet_path, self.sprite_size)
+            if self.current_sprites is None:
+                self.current_sprites = {}
             for anim_name, frames in animation_frames.items():
-                self.current_sprites[anim_name] = []
-                for frame in frames:
-                    x = (frame * self.sprite_size[0]) % sheet.get_width()
-                    y = ((frame * self.sprite_size[0]) // sheet.get_width()) * self.sprite_size[1]
-                    sprite = sheet.subsurface((x, y, self.sprite_size[0], self.sprite_size[1]))
-                    self.current_sprites[anim_name].append(sprite)
+                self.current_sprites[anim_name] = [sheet_frames[frame] for frame in frames]
         except Exception as e:
             print(f"Error loading sprites for {self.name}: {e}")
 
-    def get_current_sprite(self) -> Optional[pygame.Surface]:
-        if self.current_animation in self.current_sprites:
+    def get_current_sprite(self) -> Optional["pygame.Surface"]:
+        if self.current_sprites and self.current_animation in self.current_sprites:
             sprites = self.current_sprites[self.current_animation]
             if sprites:
                 return sprites[self.animation_frame % len(sprites)]
@@ -129,103 +438,127 @@ class Character:
 
 
 class Warrior(Character):
+    __slots__ = ()
+
+    SPELLS = compile_spells({
+        "Slash": {
+            "damage": 20,
+            "range": 1,
+            "ap_cost": 3,
+            "requires_target": True,
+        },
+        "Shield": {
+            "defense": 10,
+            "range": 0,
+            "ap_cost": 2,
+            "requires_target": False,
+        },
+    })
+
     def __init__(self, name: str, team: str, position: Tuple[int, int]):
         super().__init__(name, team, position)
         self.max_hp = 120
         self.current_hp = self.max_hp
-        self.spells = {
-            "Slash": {
-                "damage": 20,
-                "range": 1,
-                "ap_cost": 3,
-                "requires_target": True,
-            },
-            "Shield": {
-                "defense": 10,
-                "range": 0,
-                "ap_cost": 2,
-                "requires_target": False,
-            },
-        }
 
 
 class Archer(Character):
+    __slots__ = ()
+
+    SPELLS = compile_spells({
+        "Arrow Shot": {
+            "damage": 15,
+            "range": 4,
+            "ap_cost": 2,
+            "requires_target": True,
+        },
+        "Poison Arrow": {
+            "damage": 10,
+            "dot_damage": 5,
+            "range": 3,
+            "ap_cost": 3,
+            "requires_target": True,
+        },
+    })
+
     def __init__(self, name: str, team: str, position: Tuple[int, int]):
         super().__init__(name, team, position)
         self.max_hp = 80
         self.current_hp = self.max_hp
-        self.spells = {
-            "Arrow Shot": {
-                "damage": 15,
-                "range": 4,
-                "ap_cost": 2,
-                "requires_target": True,
-            },
-            "Poison Arrow": {
-                "damage": 10,
-                "dot_damage": 5,
-                "range": 3,
-                "ap_cost": 3,
-                "requires_target": True,
-            },
-        }
 
 
 class Player(Character):
+    __slots__ = ()
+
+    SPELLS = compile_spells({
+        "Fireball": {
+            "damage": 20,
+            "range": 4,
+            "ap_cost": 3,
+            "requires_target": True,
+            "requires_los": True,
+            "color": (255, 100, 0),
+            "sound_effect": "fireball.wav",
+        },
+        "Ice Bolt": {
+            "damage": 15,
+            "range": 3,
+            "ap_cost": 2,
+            "requires_target": True,
+            "requires_los": True,
+            "color": (0, 200, 255),
+            "sound_effect": "ice.wav",
+        },
+    })
+
     def __init__(self, name: str, position: Tuple[int, int]):
         super().__init__(name, "player", position)
         self.max_hp = 120
         self.current_hp = self.max_hp
-        self.spells = {
-            "Fireball": {
-                "damage": 20,
-                "range": 4,
-                "ap_cost": 3,
-                "requires_target": True,
-                "color": (255, 100, 0),
-            },
-            "Ice Bolt": {
-                "damage": 15,
-                "range": 3,
-                "ap_cost": 2,
-                "requires_target": True,
-                "color": (0, 200, 255),
-            },
-        }
 
 
 class Monster(Character):
+    __slots__ = ()
+
+    BOSS_SPELLS = compile_spells({
+        "Dark Strike": {
+            "damage": 35,
+            "range": 3,
+            "ap_cost": 3,
+            "requires_target": True,
+            "requires_los": True,
+            "color": (128, 0, 128),
+            "sound_effect": "dark_strike.wav",
+        },
+        "Shadow Bolt": {
+            "damage": 20,
+            "range": 4,
+            "ap_cost": 2,
+            "requires_target": True,
+            "requires_los": True,
+            "color": (75, 0, 130),
+            "sound_effect": "shadow.wav",
+        },
+    })
+
+    SPELLS = compile_spells({
+        "Bite": {
+            "damage": 25,
+            "range": 1,
+            "ap_cost": 2,
+            "requires_target": True,
+            "requires_los": True,
+            "color": (255, 0, 0),
+            "sound_effect": "bite.wav",
+        }
+    })
+
     def __init__(
         self, name: str, position: Tuple[int, int], monster_type: str = "normal"
     ):
         super().__init__(name, "enemy", position)
         if monster_type == "boss":
             self.max_hp = 200
-            self.spells = {
-                "Dark Strike": {
-                    "damage": 35,
-                    "range": 3,
-                    "ap_cost": 3,
-                    "requires_target": True,
-                    "color": (128, 0, 128),
-                },
-                "Shadow Bolt": {
-                    "damage": 20,
-                    "range": 4,
-                    "ap_cost": 2,
-                    "requires_target": True,
-                    "color": (75, 0, 130),
-                },
-            }
+            self.spells = self.BOSS_SPELLS
         else:
             self.max_hp = 100
-            self.spells = {
-                "Bite": {
-                    "damage": 25,
-                    "range": 1,
-                    "ap_cost": 2,
-                    "requires_target": True,
-                    "color": (255, 0, 0),
-                }
-            }
         self.current_hp = self.max_hp
@@ -0,0 +1,106 @@
+import heapq
+from typing import List, Tuple
+
+# Occupancy flags stored per cell in GameBoard.occupancy
+CELL_FREE = 0
+CELL_UNIT = 1
+CELL_OBSTACLE = 2
+
+# Same neighbor order the original tuple-based search used
+DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+
+class PathFinder:
+    """A* search over a flat, integer-indexed occupancy array"""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.xs = [i % width for i in range(self.size)]
+        self.ys = [i // width for i in range(self.size)]
+        self.neighbors: List[Tuple[int, ...]] = [
+            self._build_neighbors(i) for i in range(self.size)
+        ]
+
+        # Scratch buffers reused by every search. Entries are only trusted when
+        # their stamp matches the current search, so nothing is cleared between runs.
+        self._g = [0] * self.size
+        self._came_from = [-1] * self.size
+        self._seen = [0] * self.size
+        self._closed = [0] * self.size
+        self._stamp = 0
+
+    def _build_neighbors(self, index: int) -> Tuple[int, ...]:
+        x, y = self.xs[index], self.ys[index]
+        result = []
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.width and 0 <= ny < self.height:
+                result.append(ny * self.width + nx)
+        return tuple(result)
+
+    def index(self, position: Tuple[int, int]) -> int:
+        return position[1] * self.width + position[0]
+
+    def position(self, index: int) -> Tuple[int, int]:
+        return (self.xs[index], self.ys[index])
+
+    def find_path(self, occupancy: bytearray, start: int, end: int) -> List[int]:
+        """Return the cell indices from start to end, or [] if end is unreachable
+
+        Occupied cells block movement, except for the destination itself.
+        """
+        if start == end:
+            return [start]
+
+        self._stamp += 1
+        stamp = self._stamp
+        g = self._g
+        came_from = self._came_from
+        seen = self._seen
+        closed = self._closed
+        neighbors = self.neighbors
+        xs, ys = self.xs, self.ys
+        ex, ey = xs[end], ys[end]
+
+        h = abs(xs[start] - ex) + abs(ys[start] - ey)
+        g[start] = 0
+        came_from[start] = -1
+        seen[start] = stamp
+        # Ties on f prefer the node closer to the goal, which keeps expansions low
+        open_heap = [(h, h, start)]
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+
+        while open_heap:
+            _, _, current = heappop(open_heap)
+            if closed[current] == stamp:
+                continue
+
+            if current == end:
+                path = [current]
+                while current != start:
+                    current = came_from[current]
+                    path.append(current)
+                path.reverse()
+                return path
+
+            closed[current] = stamp
+            tentative_g = g[current] + 1
+
+            for neighbor in neighbors[current]:
+                if closed[neighbor] == stamp:
+                    continue
+                if occupancy[neighbor] and neighbor != end:
+                    continue
+                if seen[neighbor] == stamp and tentative_g >= g[neighbor]:
+                    continue
+
+                seen[neighbor] = stamp
+                g[neighbor] = tentative_g
+                came_from[neighbor] = current
+                h = abs(xs[neighbor] - ex) + abs(ys[neighbor] - ey)
+                heappush(open_heap, (tentative_g + h, h, neighbor))
+
+        return []  # No path found
@@ -0,0 +1,51 @@
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+
+class StartupProfiler:
+    """Times named startup phases relative to a common origin"""
+
+    def __init__(self, origin: Optional[float] = None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        # (name, start offset, duration), in seconds
+        self.phases: List[Tuple[str, float, float]] = []
+        self.marks: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, start - self.origin, time.perf_counter() - start))
+
+    def record(self, name: str, start: float, end: float):
+        """Add a phase measured outside a `with phase()` block, from perf_counter timestamps"""
+        self.phases.append((name, start - self.origin, end - start))
+
+    def mark(self, name: str):
+        self.marks[name] = time.perf_counter() - self.origin
+
+    def to_dict(self) -> dict:
+        return {
+            "phases": [
+                {"name": name, "start_ms": start * 1000, "duration_ms": duration * 1000}
+                for name, start, duration in self.phases
+            ],
+            "marks_ms": {name: offset * 1000 for name, offset in self.marks.items()},
+        }
+
+    def report(self) -> str:
+        width = max([len(name) for name, _, _ in self.phases] + [len(name) for name in self.marks] + [5])
+        lines = [f"{'phase':<{width}}  {'start ms':>9}  {'took ms':>9}"]
+        for name, start, duration in self.phases:
+            lines.append(f"{name:<{width}}  {start * 1000:>9.1f}  {duration * 1000:>9.1f}")
+        for name, offset in self.marks.items():
+            lines.append(f"{name:<{width}}  {offset * 1000:>9.1f}")
+        return "\n".join(lines)
+
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=4)
@@ -0,0 +1,61 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from battle_engine import BattleEngine
+from battle_server import BattleClient, BattleServer
+from models import Monster, Player
+
+
+class CastRangeTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = BattleEngine(20, 20, seed=1)
+        self.player = Player("Hero", (0, 0))
+        self.near = Monster("Near", (3, 0))
+        self.far = Monster("Far", (19, 19))
+        self.engine.setup_battle(self.player, [self.near, self.far])
+
+    def test_out_of_range_cast_is_rejected(self):
+        fireball = self.player.spells["Fireball"]
+        self.assertFalse(self.engine.cast_spell(self.player, fireball, self.far.position))
+        self.assertEqual(self.far.current_hp, self.far.max_hp)
+        self.assertEqual(self.player.action_points, self.player.max_action_points)
+
+    def test_in_range_cast_applies(self):
+        fireball = self.player.spells["Fireball"]
+        self.assertTrue(self.engine.cast_spell(self.player, fireball, self.near.position))
+        self.assertLess(self.near.current_hp, self.near.max_hp)
+
+    def test_server_rejects_out_of_range_cast(self):
+        async def scenario():
+            server = BattleServer(ai_nodes=0)
+            listener = await server.start("127.0.0.1", 0)
+            client = await BattleClient.connect("127.0.0.1", listener.sockets[0].getsockname()[1])
+            try:
+                reply = await client.request("new", seed=1)
+                state = reply["state"]
+                me = state["units"][state["current"]]
+                far = max(
+                    (unit for unit in state["units"] if unit["team"] != me["team"]),
+                    key=lambda unit: abs(unit["position"][0] - me["position"][0])
+                    + abs(unit["position"][1] - me["position"][1]),
+                )
+                return await client.request(
+                    "cast", session=reply["session"], spell="Fireball", target=far["position"]
+                )
+            finally:
+                await client.close()
+                listener.close()
+                await asyncio.wait(server.connection_tasks, timeout=1)
+                server.close()
+
+        reply = asyncio.run(scenario())
+        self.assertFalse(reply["ok"])
+        self.assertEqual(reply["error"], "illegal cast")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_search import SearchAI
+from battle_engine import BattleEngine, ENEMY_TEAM
+from models import Monster, Player, Spell
+
+BOMB = Spell.from_data("Bomb", {
+    "damage": 30, "range": 3, "ap_cost": 3, "requires_target": True,
+    "area_of_effect": "cross", "area_size": 1,
+})
+
+
+class SearchAITest(unittest.TestCase):
+    def setUp(self):
+        self.engine = BattleEngine(10, 10, seed=1)
+        self.player = Player("Hero", (2, 2))
+        self.ally = Player("Ally", (5, 3))
+        self.monster = Monster("Monster", (5, 2))
+        self.engine.setup_battle(self.player, [self.ally, self.monster])
+        self.ai = SearchAI(time_budget=None, max_nodes=2000)
+
+    def test_friendly_damage_lowers_the_score(self):
+        before = self.ai.evaluate(self.engine, self.player, ENEMY_TEAM)
+        self.player.current_hp -= 10
+        self.assertLess(self.ai.evaluate(self.engine, self.player, ENEMY_TEAM), before)
+        self.ally.current_hp = 0
+        self.engine.board.remove_character(self.ally.position)
+        self.assertLess(self.ai.evaluate(self.engine, self.player, ENEMY_TEAM), before - 100)
+
+    def test_even_trade_with_an_ally_is_not_cast(self):
+        # Bombing the monster also hits the ally; the trade is even, so the plan must not cast it
+        self.player.spells = {"Bomb": BOMB}
+        self.player.movement_points = 0
+        plan = self.ai.plan_turn(self.engine, self.player, ENEMY_TEAM)
+        self.assertEqual(plan, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from managers.data_manager import DataManager
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def spell_fields(table):
+    return {
+        "player_spells": {name: spell.to_dict() for name, spell in table["player_spells"].items()},
+        "monster_spells": {
+            monster_type: {name: spell.to_dict() for name, spell in spells.items()}
+            for monster_type, spells in table["monster_spells"].items()
+        },
+    }
+
+
+class SpellCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.data_path = os.path.join(self.root, "data")
+        os.mkdir(self.data_path)
+        for name in ("characters.json", "spells.json"):
+            shutil.copy(os.path.join(DATA_PATH, name), self.data_path)
+        self.expected = spell_fields(DataManager(self.data_path, use_cache=False).spell_table)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_cache_is_json_and_round_trips(self):
+        DataManager(self.data_path)
+        with open(os.path.join(self.data_path, "spells.cache")) as f:
+            self.assertIn("table", json.load(f))
+        # No temporary file is left next to it
+        self.assertEqual(sorted(os.listdir(self.data_path)), ["characters.json", "spells.cache", "spells.json"])
+        self.assertEqual(spell_fields(DataManager(self.data_path).spell_table), self.expected)
+
+    def test_unreadable_cache_is_recompiled(self):
+        with open(os.path.join(self.data_path, "spells.cache"), "wb") as f:
+            f.write(b"\x80\x04\x95not json")
+        self.assertEqual(spell_fields(DataManager(self.data_path).spell_table), self.expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from battle_engine import BattleEngine
+from models import Monster, Player, Spell
+
+HEALING_WAVE = Spell.from_data("Healing Wave", {
+    "healing": "15-20", "range": 2, "ap_cost": 3, "requires_target": True, "effect_type": "heal",
+})
+PUSH_BACK = Spell.from_data("Push Back", {
+    "push_strength": 2, "range": 1, "ap_cost": 2, "requires_target": True, "effect_type": "push",
+})
+
+
+class SpellEffectsTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = BattleEngine(10, 10, seed=1)
+        self.player = Player("Hero", (2, 2))
+        self.ally = Player("Ally", (2, 3))
+        self.monster = Monster("Monster", (3, 2))
+        self.engine.setup_battle(self.player, [self.ally, self.monster])
+
+    def test_heal_restores_ally_hp_and_is_not_counted_as_damage(self):
+        self.ally.current_hp = 50
+        self.assertTrue(self.engine.cast_spell(self.player, HEALING_WAVE, self.ally.position))
+        self.assertTrue(65 <= self.ally.current_hp <= 70)
+        self.assertEqual(self.engine.damage_by_spell, {})
+        self.assertEqual(self.engine.casts_by_spell, {})
+
+    def test_heal_ignores_enemies(self):
+        self.monster.current_hp = 50
+        self.assertFalse(self.engine.cast_spell(self.player, HEALING_WAVE, self.monster.position))
+        self.assertEqual(self.monster.current_hp, 50)
+        self.assertEqual(self.player.action_points, self.player.max_action_points)
+
+    def test_push_moves_target_away_until_blocked(self):
+        self.engine.board.add_obstacle((6, 2))
+        self.assertTrue(self.engine.cast_spell(self.player, PUSH_BACK, self.monster.position))
+        self.assertEqual(self.monster.position, (5, 2))
+        self.assertEqual(self.monster.current_hp, self.monster.max_hp)
+        self.assertEqual(self.engine.board.hash, self.engine.board.compute_hash())
+
+        self.player.action_points = self.player.max_action_points
+        self.engine.move_character(self.player, (4, 2))
+        self.assertTrue(self.engine.cast_spell(self.player, PUSH_BACK, self.monster.position))
+        self.assertEqual(self.monster.position, (5, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import heapq
+from typing import Dict, List, Optional, Tuple
+from models import Character
+
+# Time a unit with initiative 1 waits between turns. Divisible by every
+# initiative from 1 to 16, so common speeds never accumulate rounding.
+INITIATIVE_SCALE = 720720
+
+# Entry layout: [next turn time, order, unit, alive, in heap]
+TIME, ORDER, UNIT, ALIVE, IN_HEAP = range(5)
+
+
+class TurnScheduler:
+    """Initiative queue deciding who acts next
+
+    Each unit acts every INITIATIVE_SCALE // initiative time units, so a unit
+    with twice the initiative gets twice the turns. Ties go to the unit that
+    joined first, which makes equal initiatives a plain round-robin in
+    joining order. Removal only flags the heap entry; dead entries are
+    skipped when popped and compacted away once they are the majority.
+    """
+
+    def __init__(self):
+        self.heap: List[list] = []
+        self.entries: Dict[int, list] = {}
+        self.current_entry: Optional[list] = None
+        self.time = 0
+        self.next_order = 0
+        self.dead = 0
+        # Bumped on every change, so lookahead results can be cached
+        self.version = 0
+        self.upcoming_cache: Dict[int, List[Character]] = {}
+        self.upcoming_cache_version = -1
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, unit: Character) -> bool:
+        return unit.unit_id in self.entries
+
+    @property
+    def current(self) -> Optional[Character]:
+        """The unit whose turn it is; it stays current until advance() even if removed"""
+        return self.current_entry[UNIT] if self.current_entry is not None else None
+
+    def interval(self, unit: Character) -> int:
+        return INITIATIVE_SCALE // max(1, unit.initiative)
+
+    def add(self, unit: Character, delay: Optional[int] = None) -> list:
+        """Schedule a unit; it acts after `delay` time units, by default one full interval"""
+        if delay is None:
+            delay = self.interval(unit)
+        entry = [self.time + delay, self.next_order, unit, True, True]
+        self.next_order += 1
+        self.entries[unit.unit_id] = entry
+        heapq.heappush(self.heap, entry)
+        self.version += 1
+        return entry
+
+    def remove(self, unit: Character) -> Optional[list]:
+        """Take a unit out of the rotation; returns the entry, which restore() accepts"""
+        entry = self.entries.pop(unit.unit_id, None)
+        if entry is None:
+            return None
+        entry[ALIVE] = False
+        self.version += 1
+        if entry is not self.current_entry:
+            self.dead += 1
+            if self.dead > 32 and self.dead * 2 > len(self.heap):
+                self._compact()
+        return entry
+
+    def restore(self, entry: list):
+        """Undo remove() with the entry it returned"""
+        entry[ALIVE] = True
+        self.entries[entry[UNIT].unit_id] = entry
+        self.version += 1
+        if entry is self.current_entry:
+            return
+        if entry[IN_HEAP]:
+            self.dead -= 1
+        else:
+            entry[IN_HEAP] = True
+            heapq.heappush(self.heap, entry)
+
+    def _compact(self):
+        live = []
+        for entry in self.heap:
+            if entry[ALIVE]:
+                live.append(entry)
+            else:
+                entry[IN_HEAP] = False
+        heapq.heapify(live)
+        self.heap = live
+        self.dead = 0
+
+    def start(self) -> Optional[Character]:
+        """Begin the first turn; the highest initiative among the units added so far goes first"""
+        self.current_entry = None
+        return self.advance()
+
+    def advance(self) -> Optional[Character]:
+        """End the current unit's turn and start the next one"""
+        current = self.current_entry
+        if current is not None and current[ALIVE]:
+            current[TIME] += self.interval(current[UNIT])
+            current[IN_HEAP] = True
+            heapq.heappush(self.heap, current)
+        self.current_entry = None
+        heap = self.heap
+        while heap:
+            entry = heapq.heappop(heap)
+            entry[IN_HEAP] = False
+            if entry[ALIVE]:
+                self.current_entry = entry
+                self.time = entry[TIME]
+                break
+            self.dead -= 1
+        self.version += 1
+        return self.current
+
+    def upcoming(self, count: int) -> List[Character]:
+        """The next `count` turns, starting with the current one; fast units can appear several times"""
+        if self.upcoming_cache_version != self.version:
+            self.upcoming_cache = {}
+            self.upcoming_cache_version = self.version
+        cached = self.upcoming_cache.get(count)
+        if cached is not None:
+            return cached
+
+        result = []
+        queue = [(entry[TIME], entry[ORDER], entry[UNIT]) for entry in self.heap if entry[ALIVE]]
+        current = self.current_entry
+        if current is not None:
+            result.append(current[UNIT])
+            if current[ALIVE]:
+                queue.append((current[TIME] + self.interval(current[UNIT]), current[ORDER], current[UNIT]))
+        heapq.heapify(queue)
+        while queue and len(result) < count:
+            time, order, unit = heapq.heappop(queue)
+            result.append(unit)
+            heapq.heappush(queue, (time + self.interval(unit), order, unit))
+        self.upcoming_cache[count] = result
+        return result
+
+    def get_state(self) -> Tuple:
+        """Everything needed to rebuild the queue: (time, next order, current entry, queued entries)"""
+        current = self.current_entry
+        return (
+            self.time,
+            self.next_order,
+            (current[TIME], current[ORDER], current[UNIT], current[ALIVE]) if current is not None else None,
+            sorted((entry[TIME], entry[ORDER], entry[UNIT]) for entry in self.heap if entry[ALIVE]),
+        )
+
+    def set_state(self, state: Tuple):
+        self.time, self.next_order, current, queued = state
+        # Entries handed out by remove() before this call must not count as queued
+        for entry in self.heap:
+            entry[IN_HEAP] = False
+        self.entries = {}
+        self.heap = []
+        self.dead = 0
+        self.current_entry = None
+        if current is not None:
+            time, order, unit, alive = current
+            self.current_entry = [time, order, unit, alive, False]
+            if alive:
+                self.entries[unit.unit_id] = self.current_entry
+        for time, order, unit in queued:
+            entry = [time, order, unit, True, True]
+            self.entries[unit.unit_id] = entry
+            self.heap.append(entry)
+        heapq.heapify(self.heap)
+        self.version += 1
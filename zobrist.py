@@ -0,0 +1,94 @@
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Optional
+
+# Fixed so the same board state hashes the same way in every process
+ZOBRIST_SEED = 0x5EED
+MASK64 = (1 << 64) - 1
+
+
+def splitmix64(value: int) -> int:
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+class ZobristKeys:
+    """Pseudo-random 64-bit keys for board features, derived from the feature itself
+
+    A feature is a tuple of ints, strings and nested tuples such as
+    ("unit", slot, position) or ("obstacle", position); a board hash is
+    the XOR of the keys of all the features it currently has, so adding or
+    removing one is a single XOR. Keys are computed with splitmix64 rather
+    than stored, so long-running processes that see many battles don't
+    accumulate them; a small LRU cache keeps the hot ones cheap.
+    """
+
+    def __init__(self, seed: int = ZOBRIST_SEED, cache_size: int = 4096):
+        self.seed = seed
+        self.key = lru_cache(maxsize=cache_size)(self._derive)
+
+    def _derive(self, feature: Hashable) -> int:
+        value = self.seed
+        for part in feature:
+            if isinstance(part, int):
+                part_value = part & MASK64
+            elif isinstance(part, str):
+                # str hashes are salted per process; crc32 is not
+                part_value = zlib.crc32(part.encode())
+            elif isinstance(part, tuple):
+                part_value = self._derive(part)
+            else:
+                raise TypeError(f"unsupported Zobrist feature part {part!r}")
+            value = splitmix64(value ^ part_value)
+        return value
+
+
+zobrist_keys = ZobristKeys()
+
+
+class TranspositionTable:
+    """Bounded map from state hashes to search results, evicting the oldest entry when full"""
+
+    def __init__(self, max_entries: int = 1 << 16):
+        self.entries: Dict[int, Any] = {}
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, state_hash: int) -> bool:
+        return state_hash in self.entries
+
+    def lookup(self, state_hash: int) -> Optional[Any]:
+        value = self.entries.get(state_hash)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def store(self, state_hash: int, value: Any):
+        entries = self.entries
+        if state_hash not in entries and len(entries) >= self.max_entries:
+            del entries[next(iter(entries))]
+            self.evictions += 1
+        entries[state_hash] = value
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }